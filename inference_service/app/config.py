@@ -1,5 +1,27 @@
 import os
 
+def _parse_tenant_map(value: str) -> dict:
+    """Parse "alice=2,bob=0.5" into {"alice": 2.0, "bob": 0.5}"""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            tenant, number = item.split("=", 1)
+            result[tenant.strip()] = float(number)
+    return result
+
+def _parse_host_map(value: str) -> dict:
+    """Parse "node1=tcp://10.0.0.1:2375,node2=tcp://10.0.0.2:2375" into {"node1": url, ...} (in order)"""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, url = item.split("=", 1)
+            result[name.strip()] = url.strip()
+    return result
+
+def _parse_list(value: str) -> list:
+    """Parse "a, B,c" into ["a", "b", "c"]"""
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
 class Settings:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:password@db:5432/inferencedb")
@@ -11,11 +33,136 @@ class Settings:
     
     # Docker
     DOCKER_HOST = os.getenv("DOCKER_HOST", "unix://var/run/docker.sock")
+    DOCKER_HOSTS = _parse_host_map(os.getenv("DOCKER_HOSTS", "")) or {"local": DOCKER_HOST}  # pool of daemons
+    DOCKER_HOST_CAPACITY = _parse_tenant_map(os.getenv("DOCKER_HOST_CAPACITY", ""))  # container cap per host, e.g. "node2=20"
+    DOCKER_HOST_DEFAULT_CAPACITY = int(os.getenv("DOCKER_HOST_DEFAULT_CAPACITY", "0"))  # 0 = MAX_RUNNING_CONTAINERS
+    DOCKER_HOST_CPUS = _parse_tenant_map(os.getenv("DOCKER_HOST_CPUS", ""))  # CPU budget per host, e.g. "node2=30"
+    DOCKER_HOST_MEMORY_MB = _parse_tenant_map(os.getenv("DOCKER_HOST_MEMORY_MB", ""))  # memory budget per host
+    HOST_RESOURCE_FRACTION = float(os.getenv("HOST_RESOURCE_FRACTION", "0.9"))  # of a host's CPUs/memory, when not set above
+    DOCKER_LOCAL_ADDRESS = os.getenv("DOCKER_LOCAL_ADDRESS", "localhost")  # routes to containers of unix-socket hosts
+    PLACEMENT_STRATEGY = os.getenv("PLACEMENT_STRATEGY", "least_loaded")  # least_loaded | binpack
     
     # Container Management
-    MAX_RUNNING_CONTAINERS = int(os.getenv("MAX_RUNNING_CONTAINERS", "10"))
+    MAX_RUNNING_CONTAINERS = int(os.getenv("MAX_RUNNING_CONTAINERS", "0"))  # optional count cap; 0 = CPU/memory budget only
     CONTAINER_IDLE_TIMEOUT = int(os.getenv("CONTAINER_IDLE_TIMEOUT", "300"))  # 5 minutes
     CONTAINER_STARTUP_TIMEOUT = int(os.getenv("CONTAINER_STARTUP_TIMEOUT", "30"))  # 30 seconds
+    READINESS_PATH = os.getenv("READINESS_PATH", "/health")
+    READINESS_INITIAL_DELAY = float(os.getenv("READINESS_INITIAL_DELAY", "0.05"))  # seconds
+    READINESS_MAX_DELAY = float(os.getenv("READINESS_MAX_DELAY", "1.0"))  # seconds
+    MAX_REPLICAS_PER_MODEL = int(os.getenv("MAX_REPLICAS_PER_MODEL", "4"))
+    EVICTION_POLICY = os.getenv("EVICTION_POLICY", "cost")  # lru | cost
+    CLEANUP_INTERVAL = float(os.getenv("CLEANUP_INTERVAL", "60"))  # max seconds between idle checks
+    CONTAINER_DEFAULT_MEMORY_MB = float(os.getenv("CONTAINER_DEFAULT_MEMORY_MB", "512"))  # request/usage when undeclared
+    CONTAINER_DEFAULT_CPUS = float(os.getenv("CONTAINER_DEFAULT_CPUS", "0.5"))  # CPU request when undeclared
+    PAUSE_IDLE_CONTAINERS = os.getenv("PAUSE_IDLE_CONTAINERS", "True").lower() == "true"
+    CONTAINER_PAUSED_TIMEOUT = int(os.getenv("CONTAINER_PAUSED_TIMEOUT", "1800"))  # paused -> stopped, 30 minutes
+    DOCKER_MAX_WORKERS = int(os.getenv("DOCKER_MAX_WORKERS", "16"))  # threads for blocking Docker SDK calls
+    DOCKER_CALL_TIMEOUT = float(os.getenv("DOCKER_CALL_TIMEOUT", "30"))  # seconds per Docker call
+    CONTAINER_STOP_GRACE = int(os.getenv("CONTAINER_STOP_GRACE", "10"))  # seconds before SIGKILL on stop
+    LEASE_BACKEND = os.getenv("LEASE_BACKEND", "memory")  # memory (one worker) | postgres (shared fleet)
+    LEASE_TTL = float(os.getenv("LEASE_TTL", "30"))  # seconds a worker's leases survive without heartbeat
+    LEASE_HEARTBEAT_INTERVAL = float(os.getenv("LEASE_HEARTBEAT_INTERVAL", "10"))  # seconds
+    DOCKER_EVENTS_ENABLED = os.getenv("DOCKER_EVENTS_ENABLED", "True").lower() == "true"
+    DOCKER_EVENTS_RETRY_DELAY = float(os.getenv("DOCKER_EVENTS_RETRY_DELAY", "2"))  # seconds before reconnecting
+    
+    # Per-model admission control
+    MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))  # in-flight requests per replica
+    MODEL_MAX_QUEUE = int(os.getenv("MODEL_MAX_QUEUE", "64"))  # waiting requests per model
+    MODEL_QUEUE_TIMEOUT = float(os.getenv("MODEL_QUEUE_TIMEOUT", "10"))  # seconds a request may wait
+    
+    # Weighted fair scheduling across tenants (model owners)
+    FAIR_SCHEDULER_ENABLED = os.getenv("FAIR_SCHEDULER_ENABLED", "True").lower() == "true"
+    FAIR_SCHEDULER_CONCURRENCY = int(os.getenv("FAIR_SCHEDULER_CONCURRENCY", "64"))  # dispatch slots shared by all tenants
+    FAIR_SCHEDULER_QUEUE_TIMEOUT = float(os.getenv("FAIR_SCHEDULER_QUEUE_TIMEOUT", "30"))  # seconds
+    TENANT_WEIGHTS = _parse_tenant_map(os.getenv("TENANT_WEIGHTS", ""))  # e.g. "alice=2,bob=1"
+    TENANT_DEFAULT_WEIGHT = float(os.getenv("TENANT_DEFAULT_WEIGHT", "1"))
+    TENANT_RATE_LIMITS = _parse_tenant_map(os.getenv("TENANT_RATE_LIMITS", ""))  # requests/second, e.g. "alice=20"
+    TENANT_DEFAULT_RATE_LIMIT = float(os.getenv("TENANT_DEFAULT_RATE_LIMIT", "0"))  # 0 = unlimited
+    TENANT_RATE_BURST = float(os.getenv("TENANT_RATE_BURST", "2"))  # bucket size in seconds of rate
+    
+    # Hedged requests and failover across replicas (request/response inference)
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "True").lower() == "true"
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # latency samples before a model's p95 is trusted
+    HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "50"))  # never hedge sooner than this
+    HEDGE_MAX_FRACTION = float(os.getenv("HEDGE_MAX_FRACTION", "0.1"))  # of eligible requests that may be hedged
+    HEDGE_BUDGET_WINDOW = float(os.getenv("HEDGE_BUDGET_WINDOW", "60"))  # seconds; per-model hedge budget decays over this
+    FAILOVER_MAX = int(os.getenv("FAILOVER_MAX", "2"))  # other replicas tried after a connection error
+    
+    # Replica autoscaler
+    AUTOSCALE_ENABLED = os.getenv("AUTOSCALE_ENABLED", "True").lower() == "true"
+    AUTOSCALE_INTERVAL = float(os.getenv("AUTOSCALE_INTERVAL", "5"))  # seconds between evaluations
+    AUTOSCALE_TARGET_INFLIGHT = float(os.getenv("AUTOSCALE_TARGET_INFLIGHT", "4"))  # in-flight requests per replica
+    AUTOSCALE_WORKERS = int(os.getenv("AUTOSCALE_WORKERS", "1"))  # workers sharing the load; scales this worker's signals
+    AUTOSCALE_P95_TARGET = float(os.getenv("AUTOSCALE_P95_TARGET", "2.0"))  # seconds
+    AUTOSCALE_DOWN_UTILIZATION = float(os.getenv("AUTOSCALE_DOWN_UTILIZATION", "0.5"))  # of target, to remove a replica
+    AUTOSCALE_UP_CYCLES = int(os.getenv("AUTOSCALE_UP_CYCLES", "2"))  # consecutive evaluations before scaling up
+    AUTOSCALE_DOWN_CYCLES = int(os.getenv("AUTOSCALE_DOWN_CYCLES", "12"))  # consecutive evaluations before scaling down
+    AUTOSCALE_MIN_REPLICAS = int(os.getenv("AUTOSCALE_MIN_REPLICAS", "0"))  # 0 allows scale-to-zero
+    AUTOSCALE_SCALE_TO_ZERO_IDLE = int(os.getenv("AUTOSCALE_SCALE_TO_ZERO_IDLE", "300"))  # seconds without traffic
+    LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "200"))  # samples kept per model for percentiles
+    
+    # Adaptive keep-alive and predictive prewarming (learned per model)
+    ADAPTIVE_KEEPALIVE_ENABLED = os.getenv("ADAPTIVE_KEEPALIVE_ENABLED", "True").lower() == "true"
+    KEEPALIVE_PERCENTILE = float(os.getenv("KEEPALIVE_PERCENTILE", "0.99"))  # of request inter-arrival gaps
+    KEEPALIVE_MARGIN = float(os.getenv("KEEPALIVE_MARGIN", "1.2"))  # multiplier on that percentile
+    KEEPALIVE_MIN = float(os.getenv("KEEPALIVE_MIN", "60"))  # seconds
+    KEEPALIVE_MAX = float(os.getenv("KEEPALIVE_MAX", "3600"))  # seconds
+    KEEPALIVE_MIN_SAMPLES = int(os.getenv("KEEPALIVE_MIN_SAMPLES", "5"))  # gaps before leaving the global default
+    KEEPALIVE_HISTORY = int(os.getenv("KEEPALIVE_HISTORY", "256"))  # gaps kept per model
+    KEEPALIVE_RECOMPUTE_EVERY = int(os.getenv("KEEPALIVE_RECOMPUTE_EVERY", "16"))  # requests between keep-alive updates
+    PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "True").lower() == "true"
+    PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "30"))  # seconds between predictions
+    PREWARM_LEAD = float(os.getenv("PREWARM_LEAD", "60"))  # seconds ahead of predicted demand (plus time-to-ready)
+    PREWARM_MIN_EXPECTED = float(os.getenv("PREWARM_MIN_EXPECTED", "1"))  # expected requests in the coming hour
+    PREWARM_DAILY_DECAY = float(os.getenv("PREWARM_DAILY_DECAY", "0.8"))  # weight kept by each older day
+    
+    # Model HTTP client pool (one pool per running container)
+    MODEL_HTTP_MAX_CONNECTIONS = int(os.getenv("MODEL_HTTP_MAX_CONNECTIONS", "100"))
+    MODEL_HTTP_MAX_KEEPALIVE = int(os.getenv("MODEL_HTTP_MAX_KEEPALIVE", "20"))
+    MODEL_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MODEL_HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds
+    MODEL_HTTP_CONNECT_TIMEOUT = float(os.getenv("MODEL_HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+    INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))  # seconds
+    
+    # Transport to model containers
+    MODEL_TRANSPORT = os.getenv("MODEL_TRANSPORT", "port")  # port (published host port) | network (container IP) | uds
+    MODEL_NETWORK = os.getenv("MODEL_NETWORK", "")  # Docker network shared with model containers (network/uds)
+    MODEL_SOCKET_VOLUME = os.getenv("MODEL_SOCKET_VOLUME", "llmops_model_sockets")  # volume holding model sockets
+    MODEL_SOCKET_DIR = os.getenv("MODEL_SOCKET_DIR", "/run/llmops")  # its mount path, same in every container
+    
+    # Dynamic micro-batching (only for models uploaded with supports_batching)
+    BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "True").lower() == "true"
+    BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "10"))
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+    BATCH_PATH = os.getenv("BATCH_PATH", "/predict_batch")
+    
+    # Streaming inference (/infer/stream forwards the model's output as it is produced)
+    STREAM_PATH = os.getenv("STREAM_PATH", "/predict_stream")
+    
+    # Raw-body inference (/infer/raw forwards binary payloads undecoded)
+    RAW_PATH = os.getenv("RAW_PATH", "/predict_raw")
+    RAW_CONTENT_TYPES = _parse_list(os.getenv(
+        "RAW_CONTENT_TYPES",
+        "application/msgpack,application/x-msgpack,application/x-npy,"
+        "application/vnd.apache.arrow.stream,application/vnd.apache.arrow.file,"
+        "application/octet-stream,application/json"
+    ))
+    RAW_MAX_BODY_MB = float(os.getenv("RAW_MAX_BODY_MB", "256"))
+    
+    # Asynchronous jobs (submit to /api/models/{id}/jobs, then poll or fetch /api/jobs/{job_id})
+    JOBS_ENABLED = os.getenv("JOBS_ENABLED", "True").lower() == "true"
+    JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "10000"))  # queued jobs (per worker)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "32"))  # jobs dispatched concurrently
+    JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "600"))  # seconds from start to result, retries included
+    JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds a finished job stays fetchable
+    JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))  # longest long-poll, seconds
+    
+    # Inference result cache (models can opt out at upload with cacheable=false)
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "True").lower() == "true"
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))  # seconds
+    
+    # Write-behind of model status / last_used to model_registry
+    STATUS_FLUSH_INTERVAL = float(os.getenv("STATUS_FLUSH_INTERVAL", "5"))  # seconds
     
     # App
     APP_NAME = "Inference Service"
@@ -2,11 +2,20 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 import logging
 import asyncio
+import time
 from .routes import inference_routes
 from .db import init_db, get_db
 from .services.kafka_consumer import kafka_consumer
 from .services.container_manager import container_manager
 from .services.model_service import ModelService
+from .services.result_cache import result_cache
+from .services.registry_cache import registry_cache
+from .services.status_writer import status_writer
+from .services.autoscaler import autoscaler
+from .services.lifecycle_policy import lifecycle_policy
+from .services.reconciler import container_reconciler
+from .services.docker_events import docker_event_watcher
+from .services.job_queue import job_queue
 from .config import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -25,7 +34,9 @@ async def handle_kafka_event(event: dict):
             from .db import SessionLocal
             db = SessionLocal()
             try:
-                ModelService.register_model(db, event['data'])
+                model = ModelService.register_model(db, event['data'])
+                # Drop results cached for a previous registration of this id
+                result_cache.invalidate_model(model.id)
             finally:
                 db.close()
         
@@ -43,6 +54,26 @@ async def lifespan(app: FastAPI):
     init_db()
     logger.info("Database initialized")
     
+    # Warm the registry cache so the inference path needs no DB reads
+    from .db import SessionLocal
+    db = SessionLocal()
+    try:
+        registry_cache.load(db)
+    finally:
+        db.close()
+    
+    await status_writer.start()
+    logger.info("Status write-behind started")
+    
+    # Adopt model containers that outlived the previous process
+    reconciled_at = int(time.time())
+    await container_reconciler.reconcile()
+    
+    # Follow container events from then on (events during reconcile are replayed)
+    if settings.DOCKER_EVENTS_ENABLED:
+        docker_event_watcher.start(since=reconciled_at)
+        logger.info("Docker event watcher started")
+    
     # Set Kafka callback
     kafka_consumer.set_callback(handle_kafka_event)
     await kafka_consumer.start()
@@ -52,11 +83,32 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(container_manager.cleanup_idle_containers())
     logger.info("Container cleanup task started")
     
+    # Share container state with the other workers
+    if container_manager.shared:
+        asyncio.create_task(container_manager.lease_heartbeat())
+        logger.info(f"Lease heartbeat started ({container_manager.leases.name} backend)")
+    
+    if settings.AUTOSCALE_ENABLED:
+        asyncio.create_task(autoscaler.run())
+        logger.info("Replica autoscaler started")
+    
+    if settings.PREWARM_ENABLED:
+        asyncio.create_task(lifecycle_policy.run())
+        logger.info("Predictive prewarm task started")
+    
+    if settings.JOBS_ENABLED:
+        await job_queue.start()
+        logger.info(f"Job queue started ({settings.JOB_WORKERS} dispatchers)")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Inference Service...")
     await kafka_consumer.stop()
+    await job_queue.stop()
+    docker_event_watcher.stop()
+    await container_manager.close()
+    await status_writer.stop()
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
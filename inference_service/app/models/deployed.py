@@ -15,6 +15,8 @@ class ModelRegistry(Base):
     description = Column(String, nullable=True)
     docker_image = Column(String, nullable=False)
     docker_container_id = Column(String, nullable=False)
+    supports_batching = Column(Boolean, default=False)  # model exposes /predict_batch
+    cacheable = Column(Boolean, default=True)  # deterministic - results may be cached
     status = Column(String, default="available")  # available, running, stopped, failed
     external_port = Column(Integer, nullable=True)  # Port when running
     last_used = Column(DateTime, nullable=True)
@@ -23,6 +25,22 @@ class ModelRegistry(Base):
     def __repr__(self):
         return f"<ModelRegistry(id={self.id}, model_name={self.model_name}, status={self.status})>"
 
+class ContainerLease(Base):
+    """Shared ownership of a model container (or a singleton job) across workers"""
+    __tablename__ = "container_leases"
+    
+    key = Column(String, primary_key=True)  # container id, or "job:<name>"
+    owner = Column(String, nullable=False)  # worker id (host:pid)
+    state = Column(String, nullable=False)  # starting, running, paused, stopping, held
+    model_id = Column(Integer, nullable=True, index=True)
+    port = Column(Integer, nullable=True)
+    replica = Column(Boolean, default=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # owner must heartbeat before this
+    last_used = Column(DateTime, nullable=True)  # latest use seen by any worker
+    
+    def __repr__(self):
+        return f"<ContainerLease(key={self.key}, owner={self.owner}, state={self.state})>"
+
 # Pydantic Schemas
 class ModelInfo(BaseModel):
     id: int
@@ -32,6 +50,8 @@ class ModelInfo(BaseModel):
     description: Optional[str]
     docker_image: str
     docker_container_id: str
+    supports_batching: bool = False
+    cacheable: bool = True
     status: str
     external_port: Optional[int]
     last_used: Optional[datetime]
@@ -40,6 +60,9 @@ class ModelInfo(BaseModel):
     class Config:
         from_attributes = True
 
+class ScaleRequest(BaseModel):
+    replicas: int
+
 class InferenceRequest(BaseModel):
     input_data: dict
 
@@ -48,4 +71,5 @@ class InferenceResponse(BaseModel):
     model_name: str
     result: dict
     inference_time: float
-    status: str
\ No newline at end of file
+    status: str
+    cached: bool = False
\ No newline at end of file
@@ -1,15 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-import requests
 import time
 import logging
 
 from ..db import get_db
 from ..services.model_service import ModelService
 from ..services.container_manager import container_manager
-from ..models.model_registry import ModelInfo, InferenceRequest, InferenceResponse
+from ..services.replica_router import replica_router
+from ..services.admission import admission_controller
+from ..services.fair_scheduler import fair_scheduler
+from ..services.dispatcher import inference_dispatcher, as_http_error
+from ..services.batcher import micro_batcher
+from ..services.result_cache import result_cache
+from ..services.registry_cache import registry_cache
+from ..services.status_writer import status_writer
+from ..services.latency_tracker import latency_tracker, replica_latency
+from ..services.autoscaler import autoscaler
+from ..services.lifecycle_policy import lifecycle_policy
+from ..services.reconciler import container_reconciler
+from ..services.docker_events import docker_event_watcher
+from ..services.job_queue import job_queue
+from ..config import settings
+from ..models.model_registry import ModelInfo, InferenceRequest, InferenceResponse, ScaleRequest
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -33,29 +48,30 @@ async def list_models(db: Session = Depends(get_db)):
 @router.get("/api/models/{model_id}")
 async def get_model(model_id: int, db: Session = Depends(get_db)):
     """Get specific model details"""
-    model = ModelService.get_model_by_id(db, model_id)
+    model = ModelService.get_cached_model(db, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
-    return ModelInfo.from_orm(model)
+    return model
 
 @router.post("/api/models/{model_id}/start")
 async def start_model(model_id: int, db: Session = Depends(get_db)):
     """Start a model container"""
-    model = ModelService.get_model_by_id(db, model_id)
+    model = ModelService.get_cached_model(db, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     
     try:
         # Start container
-        external_port = container_manager.start_container(model.docker_container_id, model_id)
+        external_port = await container_manager.start_container(model.docker_container_id, model_id)
         
         # Update status
-        ModelService.update_model_status(db, model_id, "running", external_port)
+        ModelService.queue_status_update(model_id, "running", external_port)
         
         return {
             "status": "success",
             "message": "Model container started",
             "model_id": model_id,
+            "host": container_manager.get_container_host(model.docker_container_id),
             "external_port": external_port
         }
     except Exception as e:
@@ -64,14 +80,14 @@ async def start_model(model_id: int, db: Session = Depends(get_db)):
 
 @router.post("/api/models/{model_id}/stop")
 async def stop_model(model_id: int, db: Session = Depends(get_db)):
-    """Stop a model container"""
-    model = ModelService.get_model_by_id(db, model_id)
+    """Stop a model container (and any replicas)"""
+    model = ModelService.get_cached_model(db, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     
     try:
-        container_manager.stop_container(model.docker_container_id)
-        ModelService.update_model_status(db, model_id, "available", None)
+        await container_manager.stop_model(model_id)
+        ModelService.queue_status_update(model_id, "available", None)
         
         return {
             "status": "success",
@@ -82,6 +98,38 @@ async def stop_model(model_id: int, db: Session = Depends(get_db)):
         logger.error(f"Failed to stop model {model_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to stop container: {str(e)}")
 
+@router.post("/api/models/{model_id}/scale")
+async def scale_model(model_id: int, scale_request: ScaleRequest, db: Session = Depends(get_db)):
+    """Set the number of running replicas for a model"""
+    model = ModelService.get_cached_model(db, model_id)
+    if not model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    try:
+        containers = await container_manager.scale_model(
+            model_id,
+            model.docker_container_id,
+            model.docker_image,
+            scale_request.replicas
+        )
+        
+        if containers:
+            port = container_manager.get_container_port(containers[0])
+            ModelService.queue_status_update(model_id, "running", port)
+        else:
+            ModelService.queue_status_update(model_id, "available", None)
+        
+        return {
+            "status": "success",
+            "message": f"Model running {len(containers)} replica(s)",
+            "model_id": model_id,
+            "replicas": len(containers),
+            "containers": [cid[:12] for cid in containers]
+        }
+    except Exception as e:
+        logger.error(f"Failed to scale model {model_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to scale model: {str(e)}")
+
 @router.post("/api/models/{model_id}/infer", response_model=InferenceResponse)
 async def run_inference(
     model_id: int,
@@ -90,73 +138,220 @@ async def run_inference(
 ):
     """
     Run inference on a model
+    - Applies per-model admission control (429/503 with Retry-After when overloaded)
+    - Shares dispatch slots fairly across tenants (model owners)
     - Starts container if not running
-    - Sends request to model's API
+    - Routes to the replica with the fewest in-flight requests
+    - Serves repeated inputs from the result cache (unless the model opted out)
+    - Sends request to model's API (micro-batched if the model supports it)
     - Returns inference result
     """
-    model = ModelService.get_model_by_id(db, model_id)
+    model = ModelService.get_cached_model(db, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
     
     start_time = time.time()
     
     try:
-        # Check if container is running
-        external_port = container_manager.get_container_port(model.docker_container_id)
-        
-        # Start container if not running
-        if not external_port:
-            logger.info(f"Starting container for model {model_id}...")
-            external_port = container_manager.start_container(model.docker_container_id, model_id)
-            ModelService.update_model_status(db, model_id, "running", external_port)
-            
-            # Wait a bit for container to be ready
-            time.sleep(3)
-        
-        # Make inference request to the model container
-        model_url = f"http://localhost:{external_port}/predict"
-        logger.info(f"Sending inference request to {model_url}")
-        
-        response = requests.post(
-            model_url,
-            json=request_data.input_data,
-            timeout=30
-        )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Model returned error: {response.text}"
-            )
-        
-        result = response.json()
-        inference_time = time.time() - start_time
-        
-        # Update last used time
-        ModelService.update_model_status(db, model_id, "running", external_port)
-        
-        return InferenceResponse(
-            model_id=model_id,
-            model_name=model.model_name,
-            result=result,
-            inference_time=inference_time,
-            status="success"
-        )
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Inference request failed: {e}")
+        result, cached = await inference_dispatcher.infer(model, request_data.input_data)
+    except Exception as e:
+        raise as_http_error(e)
+    
+    return InferenceResponse(
+        model_id=model_id,
+        model_name=model.model_name,
+        result=result,
+        inference_time=time.time() - start_time,
+        status="success",
+        cached=cached
+    )
+
+@router.post("/api/models/{model_id}/infer/stream")
+async def run_streaming_inference(
+    model_id: int,
+    request_data: InferenceRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Run inference and forward the model's output as it is produced
+    - Same admission, fair scheduling and routing as /infer
+    - Calls the model's STREAM_PATH and passes its bytes through unparsed
+      (chunked transfer, the model's content type)
+    - text/event-stream responses end with an `inference_complete` event
+      carrying inference_time and time_to_first_byte
+    - Not cached and not micro-batched
+    """
+    model = ModelService.get_cached_model(db, model_id)
+    if not model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    try:
+        stream = await inference_dispatcher.open_stream(model, request_data.input_data)
+    except Exception as e:
+        raise as_http_error(e)
+    
+    return _stream_response(model_id, stream)
+
+@router.post("/api/models/{model_id}/infer/raw")
+async def run_raw_inference(model_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Run inference on a binary payload without decoding it
+    - Accepts the content types in RAW_CONTENT_TYPES (msgpack, NumPy .npy,
+      Arrow IPC, ...); anything else is rejected with 415
+    - The body is streamed to the model's RAW_PATH as it arrives, with its
+      Content-Type and the client's Accept header (the model negotiates
+      the response format)
+    - The model's answer is streamed back unparsed with its content type
+    - Same admission, fair scheduling and routing as /infer; not cached
+      and not micro-batched
+    """
+    model = ModelService.get_cached_model(db, model_id)
+    if not model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip().lower() not in settings.RAW_CONTENT_TYPES:
         raise HTTPException(
-            status_code=503,
-            detail=f"Model unavailable or not responding: {str(e)}"
+            status_code=415,
+            detail=f"Unsupported content type '{content_type}', expected one of: {', '.join(settings.RAW_CONTENT_TYPES)}"
         )
+    
+    headers = {"Content-Type": content_type}
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        if not content_length.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if int(content_length) > settings.RAW_MAX_BODY_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"Request body exceeds {settings.RAW_MAX_BODY_MB}MB")
+        # Sent as is, so the body is not re-chunked
+        headers["Content-Length"] = content_length
+    if "accept" in request.headers:
+        headers["Accept"] = request.headers["accept"]
+    
+    try:
+        stream = await inference_dispatcher.open_raw(model, request.stream(), headers)
     except Exception as e:
-        logger.error(f"Inference failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
+        raise as_http_error(e)
+    
+    return _stream_response(model_id, stream)
+
+def _stream_response(model_id: int, stream) -> StreamingResponse:
+    """Stream a model response back to the client"""
+    # Update last used time (write-behind, off the request path)
+    ModelService.queue_status_update(model_id, "running", container_manager.get_container_port(stream.container_id))
+    
+    return StreamingResponse(
+        stream.body(),
+        media_type=stream.media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Releases the replica even if the body was never iterated
+        background=BackgroundTask(stream.close)
+    )
+
+@router.post("/api/models/{model_id}/jobs", status_code=202)
+async def submit_job(
+    model_id: int,
+    request_data: InferenceRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Submit an inference job and return at once
+    - Same body as /infer; the job runs through the same path, without
+      the INFERENCE_TIMEOUT limit (JOB_TIMEOUT instead)
+    - 503 with Retry-After when the job queue is full
+    - Poll GET /api/jobs/{job_id} (optionally long-polling with ?wait=)
+      and fetch the result from GET /api/jobs/{job_id}/result
+    """
+    if not job_queue.running:
+        raise HTTPException(status_code=503, detail="Job API is disabled")
+    
+    model = ModelService.get_cached_model(db, model_id)
+    if not model:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    try:
+        job = job_queue.submit(model, request_data.input_data)
+    except Exception as e:
+        raise as_http_error(e)
+    
+    return JSONResponse(
+        status_code=202,
+        content=job.to_dict(),
+        headers={"Location": f"/api/jobs/{job.id}"}
+    )
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """
+    Get a job's status
+    - wait: seconds to hold the request until the job finishes (long-poll,
+      capped at JOB_MAX_WAIT)
+    - Finished jobs include their result; they are kept for JOB_RESULT_TTL
+    """
+    job = _get_job(job_id)
+    await job_queue.wait(job, wait)
+    return job.to_dict(include_result=True)
+
+@router.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str, wait: float = 0):
+    """
+    Fetch a job's result (same body as /infer)
+    - 202 with the job status while it is queued or running
+    - The job's error status and detail if it failed, 409 if cancelled
+    """
+    job = _get_job(job_id)
+    await job_queue.wait(job, wait)
+    
+    if not job.finished:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    if job.status == 'failed':
+        raise HTTPException(status_code=job.error_status, detail=job.error)
+    if job.status == 'cancelled':
+        raise HTTPException(status_code=409, detail="Job was cancelled")
+    
+    return InferenceResponse(
+        model_id=job.model.id,
+        model_name=job.model.model_name,
+        result=job.result,
+        inference_time=job.finished_at - job.started_at,
+        status="success",
+        cached=job.cached
+    )
+
+@router.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = _get_job(job_id)
+    if not job_queue.cancel(job):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"status": "success", "message": "Job cancelled", "job_id": job_id}
+
+def _get_job(job_id: str):
+    job = job_queue.get(job_id) if job_queue.running else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
 
 @router.get("/api/stats")
 async def get_stats():
     """Get container manager statistics"""
-    return container_manager.get_stats()
+    stats = container_manager.get_stats()
+    stats['routing'] = replica_router.get_stats()
+    stats['admission'] = admission_controller.get_stats()
+    stats['fair_scheduler'] = fair_scheduler.get_stats()
+    stats['batching'] = micro_batcher.get_stats()
+    stats['streaming'] = inference_dispatcher.get_stats()
+    stats['jobs'] = job_queue.get_stats()
+    stats['latency'] = latency_tracker.get_stats()
+    stats['replica_latency'] = replica_latency.get_stats()
+    stats['autoscaler'] = autoscaler.get_stats()
+    stats['lifecycle'] = lifecycle_policy.get_stats()
+    stats['reconciler'] = container_reconciler.get_stats()
+    stats['docker_events'] = docker_event_watcher.get_stats()
+    stats['result_cache'] = result_cache.get_stats()
+    stats['registry_cache'] = registry_cache.get_stats()
+    stats['status_writes'] = status_writer.get_stats()
+    return stats
 
 @router.get("/health")
 async def health_check():
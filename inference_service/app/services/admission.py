@@ -0,0 +1,142 @@
+import math
+import logging
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+from ..config import settings
+from .container_manager import container_manager
+from .latency_tracker import latency_tracker
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """Request refused before reaching a model container"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class ModelGate:
+    """Concurrency slots and FIFO wait queue for one model"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0  # queue full
+        self.timed_out = 0  # queue deadline exceeded
+
+class AdmissionController:
+    """
+    Per-model admission control and backpressure
+    - At most MODEL_MAX_CONCURRENCY in-flight requests per replica
+    - Up to MODEL_MAX_QUEUE requests wait in FIFO order
+    - A full queue is rejected at once with 429; a request that waits
+      longer than MODEL_QUEUE_TIMEOUT gets 503. Both carry Retry-After.
+    """
+
+    def __init__(self):
+        self.gates: Dict[int, ModelGate] = {}  # model_id: gate
+
+    def _gate(self, model_id: int) -> ModelGate:
+        gate = self.gates.get(model_id)
+        if gate is None:
+            gate = ModelGate()
+            self.gates[model_id] = gate
+        return gate
+
+    def limit(self, model_id: int) -> int:
+        """Concurrency limit for a model, growing with its replica count"""
+        replicas = max(1, len(container_manager.get_model_containers(model_id)))
+        return settings.MODEL_MAX_CONCURRENCY * replicas
+
+    def retry_after(self, model_id: int) -> int:
+        """Seconds a rejected client should wait, from queue length and p95"""
+        gate = self._gate(model_id)
+        p95 = latency_tracker.p95(model_id) or 1.0
+        return max(1, math.ceil(p95 * (len(gate.waiters) + 1) / self.limit(model_id)))
+
+    def queue_depth(self, model_id: int) -> int:
+        """Requests waiting for a slot"""
+        gate = self.gates.get(model_id)
+        return len(gate.waiters) if gate else 0
+
+    @asynccontextmanager
+    async def admit(self, model_id: int) -> AsyncIterator[None]:
+        """Hold one of the model's concurrency slots for the duration of a request"""
+        gate = self._gate(model_id)
+
+        if gate.in_flight < self.limit(model_id) and not gate.waiters:
+            gate.in_flight += 1
+        else:
+            if len(gate.waiters) >= settings.MODEL_MAX_QUEUE:
+                gate.rejected += 1
+                raise AdmissionRejected(429, f"Model {model_id} is overloaded, queue is full", self.retry_after(model_id))
+
+            waiter = asyncio.get_running_loop().create_future()
+            gate.waiters.append(waiter)
+            try:
+                # The slot is handed over by _release (in_flight already counted)
+                await asyncio.wait_for(waiter, settings.MODEL_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._discard(gate, waiter)
+                # The slot may have been granted just as the deadline fired
+                if not waiter.done() or waiter.cancelled():
+                    gate.timed_out += 1
+                    raise AdmissionRejected(
+                        503,
+                        f"Model {model_id} did not accept the request within {settings.MODEL_QUEUE_TIMEOUT}s",
+                        self.retry_after(model_id)
+                    )
+            except asyncio.CancelledError:
+                self._discard(gate, waiter)
+                if waiter.done() and not waiter.cancelled():
+                    self._release(model_id, gate)
+                raise
+
+        gate.admitted += 1
+        try:
+            yield
+        finally:
+            self._release(model_id, gate)
+
+    def _discard(self, gate: ModelGate, waiter: asyncio.Future):
+        try:
+            gate.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, model_id: int, gate: ModelGate):
+        """Free a slot and hand free slots to waiting requests"""
+        gate.in_flight -= 1
+        limit = self.limit(model_id)
+        while gate.waiters and gate.in_flight < limit:
+            waiter = gate.waiters.popleft()
+            if not waiter.done():
+                gate.in_flight += 1
+                waiter.set_result(True)
+
+    def get_stats(self) -> dict:
+        """Get admission statistics"""
+        return {
+            'max_concurrency_per_replica': settings.MODEL_MAX_CONCURRENCY,
+            'max_queue': settings.MODEL_MAX_QUEUE,
+            'queue_timeout': settings.MODEL_QUEUE_TIMEOUT,
+            'models': {
+                str(model_id): {
+                    'in_flight': gate.in_flight,
+                    'queue_depth': len(gate.waiters),
+                    'limit': self.limit(model_id),
+                    'admitted': gate.admitted,
+                    'rejected': gate.rejected,
+                    'timed_out': gate.timed_out
+                }
+                for model_id, gate in self.gates.items()
+            }
+        }
+
+# Global instance
+admission_controller = AdmissionController()
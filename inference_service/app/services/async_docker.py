@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class DockerTimeoutError(Exception):
+    """A Docker call did not finish within its timeout"""
+
+class AsyncDocker:
+    """
+    Async facade over the blocking Docker SDK
+    - Every call runs in a bounded thread pool (DOCKER_MAX_WORKERS), so a
+      slow daemon call (e.g. a 10s stop) never blocks the event loop
+    - Every call has a timeout; on timeout the caller gets
+      DockerTimeoutError while the worker thread finishes in the background
+    """
+
+    def __init__(self, client, max_workers: int = None, timeout: float = None):
+        self.client = client
+        self.timeout = timeout or settings.DOCKER_CALL_TIMEOUT
+        self.max_workers = max_workers or settings.DOCKER_MAX_WORKERS
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="docker")
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def call(self, fn: Callable, *args, call_timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking SDK call in the pool (kwargs go to the SDK call)"""
+        loop = asyncio.get_running_loop()
+        timeout = call_timeout or self.timeout
+        self.calls += 1
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs)),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DockerTimeoutError(f"Docker call {getattr(fn, '__name__', fn)} timed out after {timeout}s")
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def get(self, container_id: str):
+        return await self.call(self.client.containers.get, container_id)
+
+    async def list(self, **kwargs) -> list:
+        return await self.call(self.client.containers.list, **kwargs)
+
+    async def run(self, image: str, **kwargs):
+        return await self.call(self.client.containers.run, image, **kwargs)
+
+    async def start(self, container):
+        """Start a container and refresh its attrs (port mapping)"""
+        await self.call(container.start)
+        await self.call(container.reload)
+
+    async def reload(self, container):
+        await self.call(container.reload)
+
+    async def stop(self, container, grace: Optional[float] = None):
+        """Stop a container (SIGKILL after `grace` seconds)"""
+        grace = settings.CONTAINER_STOP_GRACE if grace is None else grace
+        await self.call(container.stop, timeout=int(grace), call_timeout=self.timeout + grace)
+
+    async def pause(self, container):
+        await self.call(container.pause)
+
+    async def unpause(self, container):
+        await self.call(container.unpause)
+
+    async def stats(self, container) -> dict:
+        return await self.call(container.stats, stream=False, one_shot=True)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def get_stats(self) -> dict:
+        """Get Docker call statistics"""
+        return {
+            'max_workers': self.max_workers,
+            'in_flight': self.in_flight,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'call_timeout': self.timeout
+        }
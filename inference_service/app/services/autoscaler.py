@@ -0,0 +1,181 @@
+import math
+import logging
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+from ..config import settings
+from ..db import SessionLocal
+from .container_manager import container_manager
+from .replica_router import replica_router
+from .latency_tracker import latency_tracker
+from .admission import admission_controller
+from .model_service import ModelService
+
+logger = logging.getLogger(__name__)
+
+class Autoscaler:
+    """
+    Queue-depth driven replica autoscaler
+    - Adds a replica when outstanding load per replica or p95 latency is too high
+    - Removes idle replicas when load drops well below target
+    - Hysteresis: a decision must hold for several consecutive evaluations
+    - Scale-to-zero once a model sees no traffic for AUTOSCALE_SCALE_TO_ZERO_IDLE
+    - Only grows into free CPU/memory budget (no eviction of other models)
+
+    Load signals are per worker: with several workers (LEASE_BACKEND=postgres)
+    the one holding the autoscaler job only sees its own in-flight requests
+    and queues, and multiplies them by AUTOSCALE_WORKERS assuming traffic is
+    spread evenly across workers.
+    """
+
+    def __init__(self):
+        self.up_streak: Dict[int, int] = {}  # model_id: consecutive "scale up" evaluations
+        self.down_streak: Dict[int, int] = {}  # model_id: consecutive "scale down" evaluations
+        self.last_signals: Dict[int, dict] = {}  # model_id: last evaluation inputs/decision
+        self.scale_ups = 0
+        self.scale_downs = 0
+
+    def queue_depth(self, model_id: int) -> int:
+        """
+        Requests accepted for a model but still waiting for a replica
+        (ones waiting in a micro-batch already count as in flight)
+        """
+        return admission_controller.queue_depth(model_id)
+
+    def desired_replicas(self, model_id: int, replicas: int) -> int:
+        """Replica count the current signals ask for (before hysteresis)"""
+        # Each request counts once: at a replica (in flight) or waiting for one (queued)
+        workers = max(settings.AUTOSCALE_WORKERS, 1)
+        in_flight = replica_router.model_in_flight(model_id) * workers
+        queued = self.queue_depth(model_id) * workers
+        p95 = latency_tracker.p95(model_id)
+        target = settings.AUTOSCALE_TARGET_INFLIGHT
+
+        desired = math.ceil(in_flight / target) if in_flight else 0
+        if queued > target * max(replicas, 1) or (p95 is not None and p95 > settings.AUTOSCALE_P95_TARGET and in_flight > 0):
+            desired = max(desired, replicas + 1)
+
+        # Only shrink once the remaining replicas would run well below target
+        if desired < replicas and in_flight > (replicas - 1) * target * settings.AUTOSCALE_DOWN_UTILIZATION:
+            desired = replicas
+
+        # Keep at least one replica while the model has recent traffic
+        if desired == 0 and not self._idle_for_scale_to_zero(model_id):
+            desired = 1
+
+        desired = max(settings.AUTOSCALE_MIN_REPLICAS, min(desired, settings.MAX_REPLICAS_PER_MODEL))
+
+        self.last_signals[model_id] = {
+            'replicas': replicas,
+            'desired': desired,
+            'in_flight': in_flight,
+            'queue_depth': queued,
+            'p95': round(p95, 4) if p95 is not None else None
+        }
+        return desired
+
+    def _idle_for_scale_to_zero(self, model_id: int) -> bool:
+        """Whether every replica of a model has been idle long enough to stop"""
+        # Never undercut the model's learned keep-alive
+        idle = max(settings.AUTOSCALE_SCALE_TO_ZERO_IDLE, container_manager.get_keep_alive(model_id))
+        cutoff = datetime.utcnow() - timedelta(seconds=idle)
+        return all(
+            container_manager.running_containers[cid]['last_used'] < cutoff
+            for cid in container_manager.get_model_containers(model_id)
+            if cid in container_manager.running_containers
+        )
+
+    async def evaluate(self, model_id: int):
+        """Evaluate one model and apply at most one scaling step"""
+        replicas = len(container_manager.get_model_containers(model_id))
+        desired = self.desired_replicas(model_id, replicas)
+
+        if desired > replicas:
+            self.down_streak.pop(model_id, None)
+            self.up_streak[model_id] = self.up_streak.get(model_id, 0) + 1
+            if self.up_streak[model_id] >= settings.AUTOSCALE_UP_CYCLES:
+                self.up_streak.pop(model_id, None)
+                await self._scale_up(model_id)
+        elif desired < replicas:
+            self.up_streak.pop(model_id, None)
+            self.down_streak[model_id] = self.down_streak.get(model_id, 0) + 1
+            if self.down_streak[model_id] >= settings.AUTOSCALE_DOWN_CYCLES:
+                self.down_streak.pop(model_id, None)
+                await self._scale_down(model_id)
+        else:
+            self.up_streak.pop(model_id, None)
+            self.down_streak.pop(model_id, None)
+
+    async def _scale_up(self, model_id: int):
+        """Add one replica if a Docker host has budget for it"""
+        if not container_manager.has_capacity(model_id):
+            logger.info(f"Autoscaler: model {model_id} wants another replica but no Docker host has CPU/memory budget for it")
+            return
+
+        db = SessionLocal()
+        try:
+            model = ModelService.get_cached_model(db, model_id)
+        finally:
+            db.close()
+        if not model:
+            return
+
+        logger.info(f"Autoscaler: adding replica for model {model_id}")
+        await container_manager.start_replica(model_id, model.docker_image, evict=False)
+        self.scale_ups += 1
+
+    async def _scale_down(self, model_id: int):
+        """Remove one idle replica (extra replicas before the primary container)"""
+        candidates = [
+            cid for cid in container_manager.get_model_containers(model_id)
+            if replica_router.in_flight.get(cid, 0) == 0
+        ]
+        if not candidates:
+            return
+
+        candidates.sort(key=lambda cid: not container_manager.running_containers[cid].get('replica', False))
+        victim = candidates[0]
+        logger.info(f"Autoscaler: removing replica {victim[:12]} of model {model_id}")
+        await container_manager.stop_container(victim)
+        self.scale_downs += 1
+
+        if not container_manager.get_model_containers(model_id):
+            ModelService.queue_status_update(model_id, "available", None)
+
+    async def run(self):
+        """Background task evaluating every running model"""
+        while True:
+            try:
+                await asyncio.sleep(settings.AUTOSCALE_INTERVAL)
+                # With several workers only one of them scales
+                if not await container_manager.hold_job('autoscaler'):
+                    continue
+
+                for model_id in list(container_manager.model_containers.keys()):
+                    try:
+                        await self.evaluate(model_id)
+                    except Exception as e:
+                        logger.error(f"Autoscaler failed for model {model_id}: {e}")
+
+                # Forget models that are no longer running
+                for model_id in list(self.last_signals.keys()):
+                    if model_id not in container_manager.model_containers:
+                        self.last_signals.pop(model_id, None)
+                        self.up_streak.pop(model_id, None)
+                        self.down_streak.pop(model_id, None)
+
+            except Exception as e:
+                logger.error(f"Error in autoscaler task: {e}")
+
+    def get_stats(self) -> dict:
+        """Get autoscaler statistics"""
+        return {
+            'enabled': settings.AUTOSCALE_ENABLED,
+            'workers': max(settings.AUTOSCALE_WORKERS, 1),
+            'scale_ups': self.scale_ups,
+            'scale_downs': self.scale_downs,
+            'models': {str(model_id): signals for model_id, signals in self.last_signals.items()}
+        }
+
+# Global instance
+autoscaler = Autoscaler()
@@ -0,0 +1,128 @@
+import httpx
+import logging
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Server-side dynamic micro-batching for models that support it
+    - Requests to the same container within BATCH_WINDOW_MS are grouped
+    - A batch is sent early once it reaches BATCH_MAX_SIZE
+    - One POST to BATCH_PATH per batch; results are split back per caller
+
+    Batch contract: the model receives a JSON list of inputs and must
+    return a JSON list of results in the same order.
+
+    A batch is sent with the longest timeout of its callers, so an async
+    job (JOB_TIMEOUT) is not cut off at INFERENCE_TIMEOUT.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, List[Tuple[dict, asyncio.Future, float]]] = {}  # container_id: queued (input, future, timeout)
+        self.flush_timers: Dict[str, asyncio.Task] = {}  # container_id: window timer
+        self.sending: Set[asyncio.Task] = set()  # full batches sent early, referenced until done
+        self.batches_sent = 0
+        self.requests_batched = 0
+        self.largest_batch = 0
+
+    async def submit(self, container_id: str, client: httpx.AsyncClient, input_data: dict,
+                     timeout: Optional[float] = None) -> dict:
+        """Queue one input for the container's next batch and wait for its result; `timeout` overrides INFERENCE_TIMEOUT"""
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.setdefault(container_id, [])
+        batch.append((input_data, future, timeout if timeout is not None else settings.INFERENCE_TIMEOUT))
+
+        if len(batch) >= settings.BATCH_MAX_SIZE:
+            # Batch is full - send immediately
+            task = asyncio.create_task(self._send_batch(client, self._take_batch(container_id)))
+            self.sending.add(task)
+            task.add_done_callback(self._sent)
+        elif container_id not in self.flush_timers:
+            # First item of a new batch - open the window
+            self.flush_timers[container_id] = asyncio.create_task(
+                self._flush_after_window(container_id, client)
+            )
+
+        return await future
+
+    def _sent(self, task: asyncio.Task):
+        """Drop a finished send task and surface anything _send_batch did not handle"""
+        self.sending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Batch send task failed: {task.exception()}")
+
+    def _take_batch(self, container_id: str) -> List[Tuple[dict, asyncio.Future, float]]:
+        """Detach the pending batch and cancel its window timer"""
+        timer = self.flush_timers.pop(container_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        return self.pending.pop(container_id, [])
+
+    async def _flush_after_window(self, container_id: str, client: httpx.AsyncClient):
+        """Send whatever has accumulated once the batching window closes"""
+        await asyncio.sleep(settings.BATCH_WINDOW_MS / 1000.0)
+        batch = self._take_batch(container_id)
+        if batch:
+            await self._send_batch(client, batch)
+
+    async def _send_batch(self, client: httpx.AsyncClient, batch: List[Tuple[dict, asyncio.Future, float]]):
+        """Make one model call for the whole batch and resolve every caller"""
+        # Skip callers that gave up while waiting
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        self.batches_sent += 1
+        self.requests_batched += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            timeout = max(entry_timeout for _, _, entry_timeout in batch)
+            response = await client.post(
+                settings.BATCH_PATH,
+                json=[item for item, _, _ in batch],
+                timeout=httpx.Timeout(timeout, connect=settings.MODEL_HTTP_CONNECT_TIMEOUT)
+            )
+
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Model returned error: {response.text}"
+                )
+
+            results = response.json()
+            if not isinstance(results, list) or len(results) != len(batch):
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"Model returned a malformed batch response for {len(batch)} inputs"
+                )
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> dict:
+        """Get batching statistics"""
+        return {
+            'enabled': settings.BATCHING_ENABLED,
+            'window_ms': settings.BATCH_WINDOW_MS,
+            'max_batch_size': settings.BATCH_MAX_SIZE,
+            'batches_sent': self.batches_sent,
+            'requests_batched': self.requests_batched,
+            'avg_batch_size': round(self.requests_batched / self.batches_sent, 2) if self.batches_sent else 0,
+            'largest_batch': self.largest_batch,
+            'pending': sum(len(b) for b in self.pending.values())
+        }
+
+# Global instance
+micro_batcher = MicroBatcher()
@@ -1,62 +1,167 @@
-import docker
-import time
+import httpx
 import logging
+import os
+import math
+import socket
 import asyncio
+import time
+import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Set
 from ..config import settings
+from .http_client_pool import HttpClientPool
+from .readiness import ReadinessProbe, ContainerNotReadyError
+from .eviction import EvictionEngine, build_policy
+from .docker_pool import DockerHost, build_docker_pool
+from .lease_store import Lease, MemoryLeaseStore, build_lease_store
 
 logger = logging.getLogger(__name__)
 
+# Labels set on model containers at creation (upload_service uses the same keys)
+MANAGED_LABEL = 'llmops.managed'
+MODEL_ID_LABEL = 'llmops.model_id'
+UPLOAD_ID_LABEL = 'llmops.upload_id'
+REPLICA_LABEL = 'llmops.replica'
+SOCKET_LABEL = 'llmops.socket'  # socket file name in the shared socket volume
+CPU_REQUEST_LABEL = 'llmops.cpu_request'  # CPUs reserved for the container
+CPU_LIMIT_LABEL = 'llmops.cpu_limit'
+MEMORY_REQUEST_LABEL = 'llmops.memory_request_mb'  # MB reserved for the container
+MEMORY_LIMIT_LABEL = 'llmops.memory_limit_mb'
+
+class InsufficientResourcesError(Exception):
+    """No Docker host can fit a container's CPU/memory request, even after evicting idle containers"""
+    pass
+
 class ContainerManager:
     """
     Manages Docker containers for ML models
     - Starts containers on demand
-    - Stops idle containers
+    - Pauses idle containers (warm tier), stops them after a longer timeout
     - Tracks container status and ports
+    - Owns one keep-alive HTTP pool per running container
+    - Runs extra replicas of a model from its docker_image
+    - All Docker SDK calls go through AsyncDocker (never on the event loop)
+    - Containers run on a pool of Docker hosts: new ones are placed by
+      PLACEMENT_STRATEGY and requests go to the host's address
+    - MODEL_TRANSPORT can bypass the published port: container IP on a
+      shared network, or a unix socket on a shared volume
+    - Admission and eviction work against each host's CPU/memory budget:
+      a container starts once its requests (declared at upload) fit
+    - Container ownership is coordinated through a lease store, so several
+      workers can share one fleet (LEASE_BACKEND=postgres): one worker
+      starts a container, the others adopt it; only the owner pauses or
+      stops it for idleness
     """
     
     def __init__(self):
-        try:
-            self.client = docker.DockerClient(base_url='unix://var/run/docker.sock')
-            self.client.ping()
-            logger.info("Docker client initialized")
-        except Exception as e:
-            logger.error(f"Failed to initialize Docker client: {e}")
-            self.client = None
+        self.pool = build_docker_pool()
+        # Default host: the one containers are looked up on when unknown
+        self.client = self.pool.default.client
+        self.docker = self.pool.default.docker
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.leases = build_lease_store(settings.LEASE_BACKEND)
+        self.shared = not isinstance(self.leases, MemoryLeaseStore)
+        self.peer_starts = 0
         
-        self.running_containers = {}  # container_id: {port, last_used, model_id}
+        self.running_containers = {}  # container_id: {port, last_used, model_id, replica}
+        self.model_containers: Dict[int, Set[str]] = {}  # model_id: running container ids
+        self.paused_containers = {}  # container_id: same info as running_containers
+        self.model_paused: Dict[int, Set[str]] = {}  # model_id: paused container ids
+        self.http_clients = HttpClientPool()
+        self.readiness = ReadinessProbe()
+        self.starting = {}  # container_id: asyncio.Task (single-flight cold starts)
+        self.locks: Dict[str, list] = {}  # container_id: [lock serializing start/pause/resume/stop, holders + waiters]
+        self.in_flight: Dict[str, int] = {}  # container_id: requests being served (kept by the replica router)
+        self.eviction = EvictionEngine(build_policy(settings.EVICTION_POLICY))
+        self.paused_eviction = EvictionEngine(build_policy(settings.EVICTION_POLICY))
+        self.cold_starts = 0
+        self.coalesced_starts = 0
+        self.pauses = 0
+        self.resumes = 0
+        self.resume_latencies = deque(maxlen=settings.LATENCY_WINDOW)
+        self.tier_seconds = {'running': 0.0, 'paused': 0.0, 'stopped': 0.0}
+        self.model_stopped_at: Dict[int, float] = {}  # model_id: when its last container stopped
+        self.keep_alive: Dict[int, float] = {}  # model_id: learned idle timeout (seconds)
+        self.model_resources: Dict[int, dict] = {}  # model_id: requests/limits seen on its containers
     
-    def start_container(self, container_id: str, model_id: int) -> Optional[int]:
+    async def start_container(self, container_id: str, model_id: int) -> Optional[int]:
         """
         Start a container and return its external port
+        Returns only once the model server answers HTTP
+        
+        Concurrent callers for the same container share a single startup:
+        the first one does the Docker work, the rest await its result.
         """
-        if not self.client:
+        if not self.pool.available_hosts():
             raise Exception("Docker client not available")
         
+        # Check if already running
+        if container_id in self.running_containers:
+            logger.info(f"Container {container_id[:12]} already running")
+            self.running_containers[container_id]['last_used'] = datetime.utcnow()
+            return self.running_containers[container_id]['port']
+        
+        # Warm tier: unpausing takes milliseconds
+        if container_id in self.paused_containers:
+            port = await self.resume_container(container_id)
+            if port is not None:
+                return port
+        
+        # Join a startup already in flight
+        task = self.starting.get(container_id)
+        if task is not None:
+            self.coalesced_starts += 1
+            logger.info(f"Waiting for in-flight start of container {container_id[:12]}")
+            return await asyncio.shield(task)
+        
+        task = asyncio.create_task(self._locked_start(container_id, model_id))
+        self.starting[container_id] = task
+        task.add_done_callback(lambda _: self.starting.pop(container_id, None))
+        
+        # Shield so one cancelled caller does not abort the shared startup
+        return await asyncio.shield(task)
+    
+    async def _locked_start(self, container_id: str, model_id: int) -> int:
+        """Start under the container's lock, so it never overlaps a pause, resume or stop"""
+        async with self._lock(container_id):
+            # Resumed or adopted while we waited for a stop to finish
+            info = self.running_containers.get(container_id)
+            if info is not None:
+                return info['port']
+            return await self._start_container(container_id, model_id)
+    
+    async def _start_container(self, container_id: str, model_id: int) -> int:
+        """Do the actual Docker start (only ever one per container at a time)"""
+        lease = await self._lease('acquire', container_id, self.worker_id, settings.LEASE_TTL, 'starting', model_id)
+        if lease.owner != self.worker_id:
+            # Another worker is starting or running it: share that container
+            return await self._join_peer_start(container_id, model_id)
+        
+        self.cold_starts += 1
         try:
-            # Check if already running
-            if container_id in self.running_containers:
-                logger.info(f"Container {container_id[:12]} already running")
-                self.running_containers[container_id]['last_used'] = datetime.utcnow()
-                return self.running_containers[container_id]['port']
-            
-            # Check if we're at capacity
-            if len(self.running_containers) >= settings.MAX_RUNNING_CONTAINERS:
-                logger.warning("Max containers reached, stopping oldest idle container")
-                self._stop_oldest_idle_container()
-            
-            # Get container
-            container = self.client.containers.get(container_id)
-            
-            # Start if not running
-            if container.status != 'running':
-                logger.info(f"Starting container {container_id[:12]}...")
-                container.start()
-                
-                # Wait for container to be ready
-                time.sleep(2)
-                container.reload()
+            # The container exists on the host the upload service created it on
+            host = await self.pool.locate(container_id)
+            if host is None:
+                raise Exception(f"Container {container_id[:12]} not found on any Docker host")
+            
+            container = await host.docker.get(container_id)
+            
+            # Reserve its requests on its host (paused containers keep theirs: they still hold memory)
+            resources = self._resources(container)
+            self.model_resources[model_id] = resources
+            await self._make_room(resources, host)
+            self.pool.assign(container_id, host, resources['cpus'], resources['memory_mb'])
+            
+            # Start if not running (a paused container left behind is unpaused)
+            if container.status == 'paused':
+                await host.docker.unpause(container)
+                await host.docker.reload(container)
+            elif container.status != 'running':
+                logger.info(f"Starting container {container_id[:12]} on {host.name}...")
+                await host.docker.start(container)
+            await self._attach_network(container, host)
             
             # Get external port
             port_info = container.attrs['NetworkSettings']['Ports'].get('8080/tcp')
@@ -64,98 +169,897 @@ class ContainerManager:
                 raise Exception("No port mapping found")
             
             external_port = int(port_info[0]['HostPort'])
+            endpoint = self.endpoint(container, host, external_port)
+            
+            # Wait for the model server instead of a fixed sleep
+            client = self.http_clients.get_client(container_id, endpoint['port'], endpoint['address'], endpoint['uds'])
+            try:
+                await self.readiness.wait_until_ready(client, model_id)
+            except ContainerNotReadyError:
+                await self.http_clients.close_client(container_id)
+                await host.docker.stop(container)
+                raise
             
             # Track running container
-            self.running_containers[container_id] = {
+            self._track(container_id, {
                 'port': external_port,
+                'host': host.name,
+                'endpoint': endpoint,
                 'last_used': datetime.utcnow(),
                 'model_id': model_id,
-                'container': container
-            }
+                'container': container,
+                'replica': False,
+                'resources': resources,
+                'memory_mb': await self._sample_memory(container, host)
+            })
             
-            logger.info(f"Container {container_id[:12]} running on port {external_port}")
+            await self._lease('set_running', container_id, self.worker_id, external_port)
+            logger.info(f"Container {container_id[:12]} running on {host.address}:{external_port} ({host.name})")
             return external_port
             
         except Exception as e:
             logger.error(f"Failed to start container: {e}")
+            if container_id not in self.running_containers:
+                self.pool.release(container_id)
+            await self._lease('release', container_id, self.worker_id)
+            raise
+    
+    async def _join_peer_start(self, container_id: str, model_id: int) -> int:
+        """Wait for the worker holding the lease to publish the container, then adopt it"""
+        self.peer_starts += 1
+        deadline = time.monotonic() + settings.CONTAINER_STARTUP_TIMEOUT + settings.LEASE_TTL
+        delay = settings.READINESS_INITIAL_DELAY
+        
+        while time.monotonic() < deadline:
+            lease = await self._lease('get', container_id)
+            if lease is None or lease.expired():
+                # The other worker gave up or died: start it ourselves
+                return await self._start_container(container_id, model_id)
+            if lease.state in ('paused', 'running') and lease.port:
+                host = await self.pool.locate(container_id)
+                if host is None:
+                    raise Exception(f"Container {container_id[:12]} not found on any Docker host")
+                container = await host.docker.get(container_id)
+                if lease.state == 'running':
+                    self.adopt(container, model_id, lease.port, replica=lease.replica, host=host)
+                    logger.info(f"Sharing container {container_id[:12]} started by {lease.owner}")
+                    return lease.port
+                if await self._lease('transition', container_id, ['paused'], 'running'):
+                    await host.docker.unpause(container)
+                    continue
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.READINESS_MAX_DELAY)
+        
+        raise ContainerNotReadyError(f"Container {container_id[:12]} was not published by its lease holder in time")
+    
+    async def start_replica(self, model_id: int, docker_image: str, evict: bool = True) -> str:
+        """
+        Run an extra replica of a model from its image
+        Each replica gets its own random host port and is removed when stopped
+        - evict: stop idle containers to make room; with False only free
+          CPU/memory budget is used
+        Returns: container id
+        Raises: InsufficientResourcesError when it does not fit
+        """
+        if not self.pool.available_hosts():
+            raise Exception("Docker client not available")
+        
+        # Reuse a paused replica before running a new one
+        for container_id in list(self.model_paused.get(model_id, ())):
+            if self.paused_containers[container_id].get('replica', False):
+                if await self.resume_container(container_id) is not None:
+                    return container_id
+                break
+        
+        resources = self.get_model_resources(model_id)
+        if evict:
+            await self._make_room(resources)
+        elif not self._fits(resources):
+            raise InsufficientResourcesError(f"No free CPU/memory budget for another replica of model {model_id}")
+        host = self.pool.place(resources['cpus'], resources['memory_mb'])
+        if host is None:
+            raise InsufficientResourcesError(f"No Docker host has room for another replica of model {model_id}")
+        # Hold the reservation while the container is created
+        reservation = f"pending:{uuid.uuid4().hex}"
+        self.pool.assign(reservation, host, resources['cpus'], resources['memory_mb'])
+        try:
+            return await self._run_replica(model_id, docker_image, host, resources)
+        finally:
+            self.pool.forget(reservation)
+    
+    async def _run_replica(self, model_id: int, docker_image: str, host: DockerHost, resources: dict) -> str:
+        """Run one replica on `host` with the model's requests and limits, and track it once ready"""
+        labels = {
+            MANAGED_LABEL: 'true',
+            MODEL_ID_LABEL: str(model_id),
+            REPLICA_LABEL: 'true',
+            **self._resource_labels(resources)
+        }
+        options = self._limit_options(resources)
+        if settings.MODEL_TRANSPORT != 'port' and settings.MODEL_NETWORK:
+            options['network'] = settings.MODEL_NETWORK
+        if settings.MODEL_TRANSPORT == 'uds' and host.local and self._supports_uds(model_id):
+            socket_name = f"replica-{uuid.uuid4().hex[:12]}.sock"
+            labels[SOCKET_LABEL] = socket_name
+            options['environment'] = {'MODEL_SOCKET': os.path.join(settings.MODEL_SOCKET_DIR, socket_name)}
+            options['volumes'] = {settings.MODEL_SOCKET_VOLUME: {'bind': settings.MODEL_SOCKET_DIR, 'mode': 'rw'}}
+        
+        self.cold_starts += 1
+        container = await host.docker.run(
+            docker_image,
+            detach=True,
+            auto_remove=True,
+            ports={'8080/tcp': None},  # Random external port assignment
+            labels=labels,
+            **options
+        )
+        await host.docker.reload(container)
+        container_id = container.id
+        
+        try:
+            port_info = container.attrs['NetworkSettings']['Ports'].get('8080/tcp')
+            if not port_info or len(port_info) == 0:
+                raise Exception("No port mapping found")
+            external_port = int(port_info[0]['HostPort'])
+            endpoint = self.endpoint(container, host, external_port)
+            
+            client = self.http_clients.get_client(container_id, endpoint['port'], endpoint['address'], endpoint['uds'])
+            await self.readiness.wait_until_ready(client, model_id)
+        except Exception as e:
+            logger.error(f"Failed to start replica of model {model_id}: {e}")
+            await self.http_clients.close_client(container_id)
+            await host.docker.stop(container)
             raise
+        
+        await self._lease(
+            'acquire', container_id, self.worker_id, settings.LEASE_TTL, 'running', model_id, external_port, True
+        )
+        self._track(container_id, {
+            'port': external_port,
+            'host': host.name,
+            'endpoint': endpoint,
+            'last_used': datetime.utcnow(),
+            'model_id': model_id,
+            'container': container,
+            'replica': True,
+            'resources': resources,
+            'memory_mb': await self._sample_memory(container, host)
+        })
+        
+        logger.info(f"Replica {container_id[:12]} of model {model_id} running on {host.address}:{external_port} ({host.name})")
+        return container_id
+    
+    async def scale_model(self, model_id: int, primary_container_id: str, docker_image: str, replicas: int) -> List[str]:
+        """
+        Set the number of running containers for a model
+        The uploaded (primary) container is always the first one started
+        and the last one stopped.
+        Returns: running container ids
+        """
+        replicas = max(0, min(replicas, settings.MAX_REPLICAS_PER_MODEL))
+        running = self.get_model_containers(model_id)
+        
+        if replicas > len(running):
+            if primary_container_id not in self.running_containers:
+                # start_container resumes the primary if it is paused
+                await self.start_container(primary_container_id, model_id)
+            missing = replicas - len(self.get_model_containers(model_id))
+            if missing > 0:
+                await asyncio.gather(*[
+                    self.start_replica(model_id, docker_image) for _ in range(missing)
+                ])
+        elif replicas < len(running):
+            # Extra replicas go first, the primary container last
+            running.sort(key=lambda cid: cid == primary_container_id)
+            await self.stop_containers(running[:len(running) - replicas])
+        
+        return self.get_model_containers(model_id)
+    
+    async def stop_model(self, model_id: int):
+        """Stop every running or paused container of a model"""
+        await self.stop_containers(self.get_model_containers(model_id) + list(self.model_paused.get(model_id, ())))
+    
+    def _track(self, container_id: str, info: dict):
+        """Register a running container"""
+        info['tier_since'] = time.monotonic()
+        host = self.pool.get(info.get('host')) or self.pool.default
+        info['host'] = host.name
+        if 'endpoint' not in info:
+            info['endpoint'] = self.endpoint(info['container'], host, info['port'])
+        resources = info.setdefault('resources', self._resources(info['container']))
+        self.model_resources[info['model_id']] = resources
+        self.pool.assign(container_id, host, resources['cpus'], resources['memory_mb'])
+        self.running_containers[container_id] = info
+        self.model_containers.setdefault(info['model_id'], set()).add(container_id)
+        self.eviction.add(
+            container_id,
+            info['model_id'],
+            cost=self.readiness.get_time_to_ready(info['model_id']),
+            size=info.get('memory_mb') or settings.CONTAINER_DEFAULT_MEMORY_MB,
+            idle_timeout=self.get_keep_alive(info['model_id']),
+            group=host.name
+        )
+        stopped_at = self.model_stopped_at.pop(info['model_id'], None)
+        if stopped_at is not None:
+            self.tier_seconds['stopped'] += info['tier_since'] - stopped_at
     
-    def stop_container(self, container_id: str):
-        """Stop a running container"""
-        if not self.client:
+    def _untrack(self, container_id: str):
+        """Forget a container that is no longer running or paused"""
+        self.eviction.remove(container_id)
+        self.paused_eviction.remove(container_id)
+        
+        if container_id in self.running_containers:
+            info = self._move(container_id, 'running', None)
+        elif container_id in self.paused_containers:
+            info = self._move(container_id, 'paused', None)
+        else:
             return
         
+        # Replicas are removed on stop; primaries keep their host
+        if info.get('replica'):
+            self.pool.forget(container_id)
+        else:
+            self.pool.release(container_id)
+        model_id = info['model_id']
+        if model_id not in self.model_containers and model_id not in self.model_paused:
+            self.model_stopped_at[model_id] = time.monotonic()
+    
+    def _move(self, container_id: str, source: str, target: Optional[str]) -> dict:
+        """Move a container between the running and paused tiers (None = gone)"""
+        tiers = {
+            'running': (self.running_containers, self.model_containers),
+            'paused': (self.paused_containers, self.model_paused)
+        }
+        containers, by_model = tiers[source]
+        info = containers.pop(container_id)
+        ids = by_model.get(info['model_id'])
+        if ids is not None:
+            ids.discard(container_id)
+            if not ids:
+                del by_model[info['model_id']]
+        
+        now = time.monotonic()
+        self.tier_seconds[source] += now - info['tier_since']
+        info['tier_since'] = now
+        
+        if target is not None:
+            containers, by_model = tiers[target]
+            containers[container_id] = info
+            by_model.setdefault(info['model_id'], set()).add(container_id)
+        return info
+    
+    def _host(self, container_id: str) -> DockerHost:
+        """Docker host of a container (the default host if unknown)"""
+        return self.pool.host_of(container_id) or self.pool.default
+    
+    @staticmethod
+    def _labels(container) -> dict:
+        """Labels of a full (inspect) or sparse (list) container"""
+        attrs = container.attrs
+        return attrs.get('Labels') or (attrs.get('Config') or {}).get('Labels') or {}
+    
+    def _supports_uds(self, model_id: int) -> bool:
+        """Whether the model's containers listen on a unix socket"""
+        return any(
+            SOCKET_LABEL in self._labels(containers[cid]['container'])
+            for containers, by_model in (
+                (self.running_containers, self.model_containers), (self.paused_containers, self.model_paused)
+            )
+            for cid in by_model.get(model_id, ())
+        )
+    
+    def endpoint(self, container, host: DockerHost, external_port: int) -> dict:
+        """
+        Where requests to a container go, by MODEL_TRANSPORT
+        - uds: the container's socket on the shared volume (local hosts,
+          models uploaded with supports_uds), else as network
+        - network: container IP on MODEL_NETWORK, port 8080
+        - port (or nothing better available): host address, published port
+        """
+        transport = settings.MODEL_TRANSPORT
+        labels = self._labels(container)
+        if transport == 'uds' and host.local and SOCKET_LABEL in labels:
+            return {
+                'transport': 'uds',
+                'address': host.address,
+                'port': external_port,
+                'uds': os.path.join(settings.MODEL_SOCKET_DIR, labels[SOCKET_LABEL])
+            }
+        if transport in ('network', 'uds') and settings.MODEL_NETWORK:
+            networks = (container.attrs.get('NetworkSettings') or {}).get('Networks') or {}
+            ip = (networks.get(settings.MODEL_NETWORK) or {}).get('IPAddress')
+            if ip:
+                return {'transport': 'network', 'address': ip, 'port': 8080, 'uds': None}
+        return {'transport': 'port', 'address': host.address, 'port': external_port, 'uds': None}
+    
+    async def _attach_network(self, container, host: DockerHost):
+        """Connect a container created without it to MODEL_NETWORK"""
+        if settings.MODEL_TRANSPORT == 'port' or not settings.MODEL_NETWORK:
+            return
+        networks = (container.attrs.get('NetworkSettings') or {}).get('Networks') or {}
+        if settings.MODEL_NETWORK in networks:
+            return
         try:
-            if container_id in self.running_containers:
-                container = self.running_containers[container_id]['container']
-                container.stop()
-                del self.running_containers[container_id]
-                logger.info(f"Stopped container {container_id[:12]}")
+            network = await host.docker.call(host.client.networks.get, settings.MODEL_NETWORK)
+            await host.docker.call(network.connect, container)
+            await host.docker.reload(container)
         except Exception as e:
-            logger.error(f"Failed to stop container: {e}")
+            logger.warning(f"Could not attach {container.id[:12]} to {settings.MODEL_NETWORK}, using its host port: {e}")
+    
+    def _resident_count(self) -> int:
+        """Containers holding memory: running and paused"""
+        return len(self.running_containers) + len(self.paused_containers)
+    
+    @classmethod
+    def _resources(cls, container) -> dict:
+        """CPU/memory requests and limits declared at upload (defaults for containers without them)"""
+        labels = cls._labels(container)
+        
+        def value(label: str, default: Optional[float]) -> Optional[float]:
+            try:
+                return float(labels[label])
+            except (KeyError, TypeError, ValueError):
+                return default
+        
+        return {
+            'cpus': value(CPU_REQUEST_LABEL, settings.CONTAINER_DEFAULT_CPUS),
+            'memory_mb': value(MEMORY_REQUEST_LABEL, settings.CONTAINER_DEFAULT_MEMORY_MB),
+            'cpu_limit': value(CPU_LIMIT_LABEL, None),
+            'memory_limit_mb': value(MEMORY_LIMIT_LABEL, None)
+        }
+    
+    @staticmethod
+    def _resource_labels(resources: dict) -> dict:
+        """Labels recording requests and limits on a container we create"""
+        labels = {
+            CPU_REQUEST_LABEL: str(resources['cpus']),
+            MEMORY_REQUEST_LABEL: str(resources['memory_mb'])
+        }
+        if resources.get('cpu_limit'):
+            labels[CPU_LIMIT_LABEL] = str(resources['cpu_limit'])
+        if resources.get('memory_limit_mb'):
+            labels[MEMORY_LIMIT_LABEL] = str(resources['memory_limit_mb'])
+        return labels
+    
+    @staticmethod
+    def _limit_options(resources: dict) -> dict:
+        """Docker run options enforcing requests (shares, reservation) and limits (same as upload_service)"""
+        options = {
+            'cpu_shares': max(2, int(resources['cpus'] * 1024)),
+            'mem_reservation': f"{int(resources['memory_mb'])}m"
+        }
+        if resources.get('cpu_limit'):
+            options['nano_cpus'] = int(resources['cpu_limit'] * 1e9)
+        if resources.get('memory_limit_mb'):
+            # No swap on top of the limit: an over-limit model is OOM-killed, not slowed down
+            options['mem_limit'] = options['memswap_limit'] = f"{int(resources['memory_limit_mb'])}m"
+        return options
+    
+    def get_model_resources(self, model_id: int) -> dict:
+        """Requests and limits of a model's containers (defaults before any was seen)"""
+        return self.model_resources.get(model_id) or {
+            'cpus': settings.CONTAINER_DEFAULT_CPUS,
+            'memory_mb': settings.CONTAINER_DEFAULT_MEMORY_MB,
+            'cpu_limit': None,
+            'memory_limit_mb': None
+        }
+    
+    def _fits(self, resources: dict, host: Optional[DockerHost] = None) -> bool:
+        """Whether a container with `resources` fits on `host` (any host if None) without evicting"""
+        if settings.MAX_RUNNING_CONTAINERS and self._resident_count() >= settings.MAX_RUNNING_CONTAINERS:
+            return False
+        if host is not None:
+            return host.has_room(resources['cpus'], resources['memory_mb'])
+        return self.pool.has_room(resources['cpus'], resources['memory_mb'])
+    
+    async def _make_room(self, resources: dict, host: Optional[DockerHost] = None):
+        """
+        Evict idle containers until `resources` fit (on `host`, or on any host)
+        Raises: InsufficientResourcesError when nothing more can be evicted
+        """
+        while not self._fits(resources, host):
+            where = f"Docker host {host.name}" if host is not None else "Docker hosts"
+            logger.warning(f"{where} out of CPU/memory budget, stopping an idle container")
+            # Evict on the host itself unless only the global count cap is in the way
+            on_host = host if host is not None and not host.has_room(resources['cpus'], resources['memory_mb']) else None
+            if not await self._evict_one(on_host):
+                raise InsufficientResourcesError(
+                    f"Not enough CPU/memory on {where} for {resources['cpus']} CPUs / "
+                    f"{resources['memory_mb']:.0f}MB, and no idle container to evict"
+                )
+    
+    async def _lease(self, method: str, *args, **kwargs):
+        """Call the lease store (off the event loop when it does I/O)"""
+        fn = getattr(self.leases, method)
+        if not self.shared:
+            return fn(*args, **kwargs)
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    async def _claim(self, container_id: str, from_states: List[str], state: str, owner: Optional[str] = None,
+                     idle_before: Optional[datetime] = None) -> bool:
+        """Take the right to change a container's tier; True for containers without a lease"""
+        if await self._lease('get', container_id) is None:
+            return True
+        return await self._lease('transition', container_id, from_states, state, owner, idle_before)
+    
+    async def hold_job(self, name: str) -> bool:
+        """Whether this worker runs a fleet-wide background job (one worker at a time)"""
+        if not self.shared:
+            return True
+        lease = await self._lease('acquire', f"job:{name}", self.worker_id, settings.LEASE_TTL, 'held')
+        return lease.owner == self.worker_id
+    
+    async def pause_container(self, container_id: str):
+        """
+        Move an idle container to the warm tier
+        A paused container keeps the loaded model in memory and resumes in
+        milliseconds; it is stopped after CONTAINER_PAUSED_TIMEOUT or when
+        capacity is needed.
+        """
+        async with self._lock(container_id):
+            info = self.running_containers.get(container_id)
+            if info is None:
+                return
+            
+            if self.is_busy(container_id):
+                # A long request (job, stream) outlived the keep-alive
+                self.eviction.touch(container_id, hit=False)
+                return
+            
+            # Only the owner pauses, and only if no worker used it meanwhile
+            idle_before = datetime.utcnow() - timedelta(seconds=self.get_keep_alive(info['model_id']))
+            if not await self._claim(container_id, ['running'], 'paused', self.worker_id, idle_before):
+                self.eviction.touch(container_id, hit=False)
+                return
+            if self.is_busy(container_id):
+                # A request arrived during the lease round trip
+                await self._lease('transition', container_id, ['paused'], 'running')
+                self.eviction.touch(container_id, hit=False)
+                return
+            
+            # Stop routing to it before the Docker call; a request arriving
+            # meanwhile resumes it once the pause is done
+            self._to_paused_tier(container_id)
+            # Keep-alive connections to a frozen process would only stall
+            await self.http_clients.close_client(container_id)
+            host = self._host(container_id)
+            try:
+                await host.docker.pause(info['container'])
+            except Exception as e:
+                logger.error(f"Failed to pause container {container_id[:12]}, stopping it: {e}")
+                self._untrack(container_id)
+                try:
+                    await host.docker.stop(info['container'])
+                except Exception as stop_error:
+                    logger.error(f"Failed to stop container: {stop_error}")
+                return
+            
+            self.pauses += 1
+            logger.info(f"Paused idle container {container_id[:12]}")
+    
+    def _to_paused_tier(self, container_id: str):
+        """Move bookkeeping of a (now paused) running container to the warm tier"""
+        self._move(container_id, 'running', 'paused')
+        entry = self.eviction.remove(container_id)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            entry.idle_timeout = settings.CONTAINER_PAUSED_TIMEOUT
+            self.paused_eviction.attach(container_id, entry)
+    
+    def _to_running_tier(self, container_id: str):
+        """Move bookkeeping of a (now unpaused) container back to the running tier"""
+        info = self._move(container_id, 'paused', 'running')
+        info['last_used'] = datetime.utcnow()
+        entry = self.paused_eviction.remove(container_id)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            entry.idle_timeout = self.get_keep_alive(info['model_id'])
+            self.eviction.attach(container_id, entry)
+        return info
+    
+    def adopt(self, container, model_id: int, port: int, replica: bool = False, paused: bool = False,
+              host: Optional[DockerHost] = None) -> bool:
+        """
+        Track a container that is already up (e.g. found after a restart)
+        Returns: False if the container was already tracked
+        """
+        if container.id in self.running_containers or container.id in self.paused_containers:
+            return False
+        
+        self._track(container.id, {
+            'port': port,
+            'host': (host or self.pool.default).name,
+            'last_used': datetime.utcnow(),
+            'model_id': model_id,
+            'container': container,
+            'replica': replica,
+            'memory_mb': settings.CONTAINER_DEFAULT_MEMORY_MB
+        })
+        if paused:
+            self._to_paused_tier(container.id)
+        return True
+    
+    async def lease_adopted(self, container_id: str, model_id: int, port: int, replica: bool = False,
+                            paused: bool = False):
+        """Register an adopted container in the lease store (a live peer's lease is kept)"""
+        await self._lease(
+            'acquire', container_id, self.worker_id, settings.LEASE_TTL,
+            'paused' if paused else 'running', model_id, port, replica
+        )
+    
+    async def resume_container(self, container_id: str) -> Optional[int]:
+        """Unpause a warm container and return its external port"""
+        async with self._lock(container_id):
+            info = self.paused_containers.get(container_id)
+            if info is None:
+                # Already resumed by a concurrent caller (or gone)
+                running = self.running_containers.get(container_id)
+                return running['port'] if running else None
+            
+            if not await self._claim(container_id, ['paused'], 'running'):
+                lease = await self._lease('get', container_id)
+                if lease is not None and lease.state == 'running':
+                    # Another worker resumed it already
+                    self._to_running_tier(container_id)
+                    return info['port']
+                # Being stopped by another worker: start afresh
+                self._untrack(container_id)
+                return None
+            
+            resume_started = time.monotonic()
+            await self._host(container_id).docker.unpause(info['container'])
+            self.resume_latencies.append(time.monotonic() - resume_started)
+            self.resumes += 1
+            
+            self._to_running_tier(container_id)
+            logger.info(f"Resumed container {container_id[:12]} in {self.resume_latencies[-1] * 1000:.1f}ms")
+            return info['port']
+    
+    async def resume_model(self, model_id: int) -> Optional[str]:
+        """Resume the most recently paused container of a model, if any"""
+        paused = self.model_paused.get(model_id)
+        if not paused:
+            return None
+        container_id = max(paused, key=lambda cid: self.paused_containers[cid]['tier_since'])
+        if await self.resume_container(container_id) is None:
+            return None
+        return container_id
+    
+    async def container_gone(self, container_id: str) -> Optional[int]:
+        """
+        Drop a container that stopped outside our control (crash, OOM, docker stop)
+        Returns: its model id if it was tracked
+        """
+        info = self.running_containers.get(container_id) or self.paused_containers.get(container_id)
+        if info is None:
+            return None
+        self._untrack(container_id)
+        await self.http_clients.close_client(container_id)
+        await self._lease('release', container_id)
+        return info['model_id']
+    
+    def has_model_containers(self, model_id: int) -> bool:
+        """Whether a model has any running or paused container"""
+        return bool(self.model_containers.get(model_id) or self.model_paused.get(model_id))
+    
+    @asynccontextmanager
+    async def _lock(self, container_id: str) -> AsyncIterator[None]:
+        """
+        Per-container lock ordering start, pause, resume and stop
+        A lock is dropped only once nobody holds or waits for it, so a later
+        caller can never get a fresh lock while an old one is still in use.
+        """
+        entry = self.locks.get(container_id)
+        if entry is None:
+            entry = self.locks[container_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[container_id]
+    
+    async def stop_container(self, container_id: str):
+        """Stop a running or paused container"""
+        async with self._lock(container_id):
+            paused = container_id in self.paused_containers
+            info = self.paused_containers.get(container_id) or self.running_containers.get(container_id)
+            host = self._host(container_id)
+            if info is not None:
+                # Stop routing at once; the Docker stop can take the whole grace period
+                self._untrack(container_id)
+                await self._lease('transition', container_id, ['starting', 'running', 'paused'], 'stopping')
+            await self.http_clients.close_client(container_id)
+            
+            if info is not None:
+                try:
+                    if paused:
+                        await host.docker.unpause(info['container'])
+                    await host.docker.stop(info['container'])
+                    logger.info(f"Stopped {'paused ' if paused else ''}container {container_id[:12]}")
+                except Exception as e:
+                    logger.error(f"Failed to stop container: {e}")
+                await self._lease('release', container_id)
+    
+    async def stop_containers(self, container_ids: List[str]):
+        """Stop many containers in parallel"""
+        await asyncio.gather(*[self.stop_container(cid) for cid in container_ids])
     
     def get_container_port(self, container_id: str) -> Optional[int]:
         """Get external port for a running container"""
         if container_id in self.running_containers:
             self.running_containers[container_id]['last_used'] = datetime.utcnow()
+            self.eviction.touch(container_id, hit=False)
             return self.running_containers[container_id]['port']
         return None
     
+    def get_container_host(self, container_id: str) -> Optional[str]:
+        """Name of the Docker host a container runs on"""
+        info = self.running_containers.get(container_id) or self.paused_containers.get(container_id)
+        return info['host'] if info else None
+    
+    def get_model_containers(self, model_id: int) -> List[str]:
+        """Get ids of all running containers (primary and replicas) for a model"""
+        return list(self.model_containers.get(model_id, ()))
+    
+    def get_http_client(self, container_id: str) -> Optional[httpx.AsyncClient]:
+        """Get the pooled HTTP client for a running container"""
+        info = self.running_containers.get(container_id)
+        if not info:
+            return None
+        info['last_used'] = datetime.utcnow()
+        self.eviction.touch(container_id)
+        endpoint = info['endpoint']
+        return self.http_clients.get_client(container_id, endpoint['port'], endpoint['address'], endpoint['uds'])
+    
+    def is_busy(self, container_id: str) -> bool:
+        """Whether a request is being served by a container"""
+        return self.in_flight.get(container_id, 0) > 0
+    
+    def request_finished(self, container_id: str):
+        """Count the end of a request as use, so idle time starts when it finishes"""
+        info = self.running_containers.get(container_id)
+        if info is not None:
+            info['last_used'] = datetime.utcnow()
+            self.eviction.touch(container_id, hit=False)
+    
+    def get_keep_alive(self, model_id: int) -> float:
+        """Idle seconds before a model's containers are paused"""
+        return self.keep_alive.get(model_id, settings.CONTAINER_IDLE_TIMEOUT)
+    
+    def set_keep_alive(self, model_id: int, seconds: float):
+        """Set a per-model idle timeout and re-index its running containers"""
+        self.keep_alive[model_id] = seconds
+        for cid in self.get_model_containers(model_id):
+            self.eviction.update(cid, idle_timeout=seconds)
+    
+    def has_capacity(self, model_id: Optional[int] = None) -> bool:
+        """Whether another container (of `model_id`) can start without evicting one"""
+        if settings.MAX_RUNNING_CONTAINERS and \
+                self._resident_count() + len(self.starting) >= settings.MAX_RUNNING_CONTAINERS:
+            return False
+        resources = self.get_model_resources(model_id)
+        return self.pool.has_room(resources['cpus'], resources['memory_mb'])
+    
     def is_container_running(self, container_id: str) -> bool:
         """Check if container is running"""
         return container_id in self.running_containers
     
-    def _stop_oldest_idle_container(self):
-        """Stop the oldest idle container to free up resources"""
-        if not self.running_containers:
-            return
-        
-        # Find oldest idle container
-        oldest = None
-        oldest_time = datetime.utcnow()
-        
-        for cid, info in self.running_containers.items():
-            if info['last_used'] < oldest_time:
-                oldest_time = info['last_used']
-                oldest = cid
-        
-        if oldest:
-            logger.info(f"Stopping idle container {oldest[:12]}")
-            self.stop_container(oldest)
+    async def _sample_memory(self, container, host: DockerHost) -> float:
+        """Current memory use of a container in MB (default when unavailable)"""
+        try:
+            stats = await host.docker.stats(container)
+            return stats['memory_stats']['usage'] / (1024 * 1024)
+        except Exception as e:
+            logger.warning(f"Could not read memory of {container.id[:12]}: {e}")
+            return settings.CONTAINER_DEFAULT_MEMORY_MB
+    
+    async def _evict_one(self, host: Optional[DockerHost] = None) -> bool:
+        """
+        Stop the container the eviction policy values least (O(log n))
+        Paused containers are idle by definition, so they go first.
+        With `host`, only containers on that host are considered (victims
+        are indexed per host). Containers serving a request are never evicted.
+        Returns: whether a container was stopped
+        """
+        group = host.name if host is not None else None
+        exclude = set()  # busy candidates and ones another worker holds
+        for engine in (self.paused_eviction, self.eviction):
+            while True:
+                victim = engine.pick_victim(exclude, group)
+                if victim is None:
+                    break
+                if self.is_busy(victim):
+                    exclude.add(victim)
+                    continue
+                if not await self._claim(victim, ['running', 'paused'], 'stopping'):
+                    # Another worker is starting or stopping it; its heartbeat state catches up
+                    engine.touch(victim, hit=False)
+                    exclude.add(victim)
+                    continue
+                if self.is_busy(victim):
+                    # A request started during the lease round trip
+                    tier = 'paused' if engine is self.paused_eviction else 'running'
+                    await self._lease('transition', victim, ['stopping'], tier)
+                    exclude.add(victim)
+                    continue
+                logger.info(f"Evicting container {victim[:12]} ({engine.policy.name} policy)")
+                engine.evictions += 1
+                await self.stop_container(victim)
+                return True
+        return False
     
     async def cleanup_idle_containers(self):
-        """Background task to cleanup idle containers"""
+        """Background task to stop containers past their idle deadline"""
         while True:
             try:
-                await asyncio.sleep(60)  # Check every minute
-                
-                cutoff_time = datetime.utcnow() - timedelta(seconds=settings.CONTAINER_IDLE_TIMEOUT)
-                to_stop = []
+                # Sleep until the next idle deadline (at most CLEANUP_INTERVAL)
+                deadlines = [
+                    deadline for deadline in (self.eviction.next_deadline(), self.paused_eviction.next_deadline())
+                    if deadline is not None
+                ]
+                delay = settings.CLEANUP_INTERVAL
+                if deadlines:
+                    delay = min(delay, max(min(deadlines) - time.monotonic(), 1.0))
+                await asyncio.sleep(delay)
                 
-                for cid, info in self.running_containers.items():
-                    if info['last_used'] < cutoff_time:
-                        to_stop.append(cid)
+                # Docker calls for all expired containers run in parallel
+                idle = []
+                for cid in self.eviction.pop_expired():
+                    if self.is_busy(cid):
+                        # Still serving a long request: not idle
+                        self.eviction.touch(cid, hit=False)
+                    else:
+                        idle.append(cid)
+                if settings.PAUSE_IDLE_CONTAINERS:
+                    await asyncio.gather(*[self.pause_container(cid) for cid in idle])
+                elif idle:
+                    logger.info(f"Stopping {len(idle)} idle container(s)")
+                    await self.stop_containers(idle)
                 
-                for cid in to_stop:
-                    logger.info(f"Stopping idle container {cid[:12]} (idle for {settings.CONTAINER_IDLE_TIMEOUT}s)")
-                    self.stop_container(cid)
+                expired = []
+                for cid in self.paused_eviction.pop_expired():
+                    if await self._claim(cid, ['paused'], 'stopping', self.worker_id):
+                        expired.append(cid)
+                    else:
+                        # Paused by another worker, which stops it
+                        self.paused_eviction.touch(cid, hit=False)
+                if expired:
+                    logger.info(f"Stopping {len(expired)} container(s) paused for {settings.CONTAINER_PAUSED_TIMEOUT}s")
+                    await self.stop_containers(expired)
                     
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
     
+    async def sync_leases(self):
+        """
+        Exchange container state with the other workers
+        Renews our leases, publishes our last-use times and applies what
+        peers changed: containers they started, paused, resumed or stopped.
+        """
+        last_used = {
+            cid: info['last_used']
+            for containers in (self.running_containers, self.paused_containers)
+            for cid, info in containers.items()
+        }
+        leases: List[Lease] = await self._lease('heartbeat', self.worker_id, settings.LEASE_TTL, last_used)
+        by_key = {lease.key: lease for lease in leases}
+        
+        for container_id in list(last_used):
+            if container_id in self.starting or container_id in self.locks:
+                continue
+            lease = by_key.get(container_id)
+            if lease is None or lease.state == 'stopping':
+                self._untrack(container_id)
+                await self.http_clients.close_client(container_id)
+            elif lease.state == 'paused' and container_id in self.running_containers:
+                self._to_paused_tier(container_id)
+                await self.http_clients.close_client(container_id)
+            elif lease.state == 'running' and container_id in self.paused_containers:
+                self._to_running_tier(container_id)
+            elif lease.last_used is not None and lease.last_used > last_used[container_id]:
+                # Used through another worker: not idle
+                info = self.running_containers.get(container_id)
+                if info is not None:
+                    info['last_used'] = lease.last_used
+                    self.eviction.touch(container_id, hit=False)
+        
+        for lease in leases:
+            tracked = lease.key in self.running_containers or lease.key in self.paused_containers
+            if (
+                tracked or lease.key.startswith('job:') or lease.key in self.starting
+                or lease.state not in ('running', 'paused') or not lease.port
+            ):
+                continue
+            try:
+                host = await self.pool.locate(lease.key)
+                if host is None:
+                    continue
+                container = await host.docker.get(lease.key)
+            except Exception as e:
+                logger.warning(f"Could not inspect container {lease.key[:12]} leased by {lease.owner}: {e}")
+                continue
+            self.adopt(
+                container, lease.model_id, lease.port, replica=lease.replica,
+                paused=lease.state == 'paused', host=host
+            )
+    
+    async def lease_heartbeat(self):
+        """Background task keeping this worker's leases alive (shared lease backends only)"""
+        while True:
+            try:
+                await self.sync_leases()
+            except Exception as e:
+                logger.error(f"Error in lease heartbeat: {e}")
+            await asyncio.sleep(settings.LEASE_HEARTBEAT_INTERVAL)
+    
+    async def close(self):
+        """Release HTTP pools and Docker threads on shutdown (containers keep running)"""
+        await self.http_clients.close_all()
+        self.pool.shutdown()
+    
+    def get_tier_stats(self) -> dict:
+        """Time spent in each lifecycle tier and warm resume latency"""
+        now = time.monotonic()
+        seconds = dict(self.tier_seconds)
+        for tier, containers in (('running', self.running_containers), ('paused', self.paused_containers)):
+            seconds[tier] += sum(now - info['tier_since'] for info in containers.values())
+        seconds['stopped'] += sum(now - stopped_at for stopped_at in self.model_stopped_at.values())
+        
+        latencies = sorted(self.resume_latencies)
+        p95 = latencies[max(math.ceil(0.95 * len(latencies)) - 1, 0)] if latencies else 0.0
+        return {
+            'pause_enabled': settings.PAUSE_IDLE_CONTAINERS,
+            'paused_timeout': settings.CONTAINER_PAUSED_TIMEOUT,
+            'seconds': {tier: round(value, 1) for tier, value in seconds.items()},
+            'pauses': self.pauses,
+            'resumes': self.resumes,
+            'resume_avg_ms': round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0,
+            'resume_p95_ms': round(1000 * p95, 2)
+        }
+    
     def get_stats(self) -> dict:
         """Get container statistics"""
+        containers = [
+            (cid, info, tier)
+            for tier, tier_containers in (('running', self.running_containers), ('paused', self.paused_containers))
+            for cid, info in tier_containers.items()
+        ]
         return {
             'running_containers': len(self.running_containers),
+            'paused_containers': len(self.paused_containers),
             'max_containers': settings.MAX_RUNNING_CONTAINERS,
+            'http_pools': self.http_clients.get_stats(),
+            'docker_hosts': self.pool.get_stats(),
+            'readiness': self.readiness.get_stats(),
+            'eviction': self.eviction.get_stats(),
+            'paused_eviction': self.paused_eviction.get_stats(),
+            'tiers': self.get_tier_stats(),
+            'cold_starts': self.cold_starts,
+            'coalesced_starts': self.coalesced_starts,
+            'starting': len(self.starting),
+            'leases': {
+                'backend': self.leases.name,
+                'worker_id': self.worker_id,
+                'peer_starts': self.peer_starts
+            },
             'containers': [
                 {
                     'container_id': cid[:12],
                     'model_id': info['model_id'],
+                    'tier': tier,
+                    'replica': info.get('replica', False),
+                    'host': info['host'],
+                    'transport': info['endpoint']['transport'],
                     'port': info['port'],
+                    'memory_mb': round(info.get('memory_mb') or 0, 1),
+                    'cpu_request': info['resources']['cpus'],
+                    'memory_request_mb': info['resources']['memory_mb'],
                     'last_used': info['last_used'].isoformat()
                 }
-                for cid, info in self.running_containers.items()
+                for cid, info, tier in containers
             ]
         }
 
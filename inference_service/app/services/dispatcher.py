@@ -0,0 +1,314 @@
+import json
+import time
+import httpx
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import HTTPException
+from ..config import settings
+from .container_manager import container_manager, InsufficientResourcesError
+from .replica_router import replica_router, NoReplicaAvailableError
+from .admission import admission_controller, AdmissionRejected
+from .fair_scheduler import fair_scheduler
+from .batcher import micro_batcher
+from .lifecycle_policy import lifecycle_policy
+from .model_service import ModelService
+from .result_cache import result_cache
+from .latency_tracker import latency_tracker, replica_latency
+
+logger = logging.getLogger(__name__)
+
+def as_http_error(e: Exception) -> HTTPException:
+    """Map a failure before the model answered to an HTTP error"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, AdmissionRejected):
+        return HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if isinstance(e, (NoReplicaAvailableError, InsufficientResourcesError)):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, httpx.HTTPError):
+        logger.error(f"Inference request failed: {e}")
+        return HTTPException(
+            status_code=503,
+            detail=f"Model unavailable or not responding: {str(e)}"
+        )
+    logger.error(f"Inference failed: {e}")
+    return HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
+
+class InferenceStream:
+    """
+    One streamed inference response
+    - Holds the replica reservation (admission, fair slot, in-flight count)
+      until the body has been forwarded or the client went away
+    - Forwards the container's bytes as they arrive, without parsing them
+    - SSE responses get a final `inference_complete` event with timings
+    """
+
+    def __init__(self, model, path: str, kind: str = 'stream', **request_options):
+        self.model = model
+        self.path = path
+        self.kind = kind  # 'stream' or 'raw': which dispatcher counters it reports to
+        self.request_options = request_options  # json= / content= / headers= for the model request
+        self.stack = AsyncExitStack()
+        self.response: Optional[httpx.Response] = None
+        self.container_id: Optional[str] = None
+        self.start_time = time.time()
+        self.first_byte_time: Optional[float] = None
+        self.bytes = 0
+        self.dispatcher: Optional["InferenceDispatcher"] = None
+
+    async def open(self, dispatcher: "InferenceDispatcher"):
+        """Reserve a replica and wait for the model's response headers"""
+        self.dispatcher = dispatcher
+        try:
+            self.container_id, client = await self.stack.enter_async_context(dispatcher.reserve(self.model))
+            logger.info(f"Streaming inference from {client.base_url}{self.path.lstrip('/')}")
+            request = client.build_request("POST", self.path, **self.request_options)
+            self.response = await client.send(request, stream=True)
+            self.stack.push_async_callback(self.response.aclose)
+
+            if self.response.status_code != 200:
+                body = await self.response.aread()
+                raise HTTPException(
+                    status_code=self.response.status_code,
+                    detail=f"Model returned error: {body.decode(errors='replace')}"
+                )
+        except BaseException:
+            await self.close()
+            raise
+
+    @property
+    def media_type(self) -> str:
+        return self.response.headers.get('content-type', 'application/octet-stream')
+
+    @property
+    def is_sse(self) -> bool:
+        return self.media_type.startswith('text/event-stream')
+
+    async def body(self) -> AsyncIterator[bytes]:
+        """The model's output, chunk by chunk"""
+        dispatcher = self.dispatcher
+        dispatcher.active_streams += 1
+        try:
+            async for chunk in self.response.aiter_bytes():
+                if self.first_byte_time is None:
+                    self.first_byte_time = time.time()
+                    # Responsiveness, not generation length, is what the autoscaler should see
+                    latency_tracker.record(self.model.id, self.first_byte_time - self.start_time)
+                self.bytes += len(chunk)
+                yield chunk
+
+            if self.is_sse:
+                yield self._final_event()
+            if self.kind == 'raw':
+                dispatcher.raw_bytes_out += self.bytes
+                dispatcher.raw_completed += 1
+            else:
+                dispatcher.stream_bytes += self.bytes
+                dispatcher.streams_completed += 1
+        finally:
+            dispatcher.active_streams -= 1
+            await self.close()
+
+    def _final_event(self) -> bytes:
+        timing = {
+            'model_id': self.model.id,
+            'model_name': self.model.model_name,
+            'inference_time': time.time() - self.start_time,
+            'time_to_first_byte': (self.first_byte_time or time.time()) - self.start_time,
+            'bytes': self.bytes
+        }
+        return f"event: inference_complete\ndata: {json.dumps(timing)}\n\n".encode()
+
+    async def close(self):
+        """Release the upstream response and the reservation (idempotent)"""
+        await self.stack.aclose()
+
+class InferenceDispatcher:
+    """
+    Gets one inference request from the API to a model container
+    - Per-tenant rate limit (tenant = model owner)
+    - Admission control (per-model concurrency + bounded wait queue)
+    - Weighted fair share of dispatch slots across tenants
+    - On-demand container start (warm resume when paused)
+    - Least-outstanding replica selection, with hedging and failover
+    """
+
+    def __init__(self):
+        self.streams_started = 0
+        self.streams_completed = 0
+        self.active_streams = 0
+        self.stream_bytes = 0
+        self.raw_requests = 0
+        self.raw_completed = 0
+        self.raw_bytes_in = 0
+        self.raw_bytes_out = 0
+
+    async def ensure_running(self, model):
+        """Resume a paused replica, or start the primary, if none is running"""
+        if container_manager.get_model_containers(model.id):
+            return
+
+        container_id = await container_manager.resume_model(model.id)
+        if container_id is not None:
+            ModelService.queue_status_update(model.id, "running", container_manager.get_container_port(container_id))
+            return
+
+        logger.info(f"Starting container for model {model.id}...")
+        external_port = await container_manager.start_container(model.docker_container_id, model.id)
+        ModelService.queue_status_update(model.id, "running", external_port)
+
+    @asynccontextmanager
+    async def admitted(self, model) -> AsyncIterator[None]:
+        """
+        Admit one request for a model and make sure a replica is running
+        Raises: AdmissionRejected when the model is overloaded
+        """
+        lifecycle_policy.record_request(model.id)
+
+        if settings.FAIR_SCHEDULER_ENABLED:
+            fair_scheduler.check_rate(model.username)
+
+        async with admission_controller.admit(model.id):
+            async with self._fair_slot(model.username):
+                await self.ensure_running(model)
+                yield
+
+    @asynccontextmanager
+    async def reserve(self, model) -> AsyncIterator[Tuple[str, httpx.AsyncClient]]:
+        """
+        Reserve capacity on one replica of a model
+        Yields: (container_id, pooled HTTP client)
+        Raises: AdmissionRejected when the model is overloaded
+        """
+        async with self.admitted(model):
+            async with replica_router.acquire(model.id) as container_id:
+                client = container_manager.get_http_client(container_id)
+                if client is None:
+                    raise HTTPException(status_code=503, detail="Model container is not running")
+                yield container_id, client
+
+    @asynccontextmanager
+    async def _fair_slot(self, tenant: str) -> AsyncIterator[None]:
+        """Weighted-fair dispatch slot (no-op when the scheduler is disabled)"""
+        if not settings.FAIR_SCHEDULER_ENABLED:
+            yield
+            return
+        async with fair_scheduler.slot(tenant):
+            yield
+
+    async def infer(self, model, input_data: dict, timeout: Optional[float] = None) -> Tuple[dict, bool]:
+        """
+        Request/response inference: result cache, then a replica (hedged
+        past the model's p95, failing over on connection errors)
+        Returns: (result, served from the cache)
+        """
+        start_time = time.time()
+
+        use_cache = settings.RESULT_CACHE_ENABLED and model.cacheable
+        if use_cache:
+            cached_result = result_cache.get(model, input_data)
+            if cached_result is not None:
+                return cached_result, True
+
+        async with self.admitted(model):
+            container_id, result = await replica_router.call(
+                model.id,
+                lambda cid: self._predict_on(model, cid, input_data, timeout),
+                hedge_after=self._hedge_delay(model)
+            )
+        external_port = container_manager.get_container_port(container_id)
+
+        latency_tracker.record(model.id, time.time() - start_time)
+
+        if use_cache:
+            result_cache.put(model, input_data, result)
+
+        # Update last used time (write-behind, off the request path)
+        ModelService.queue_status_update(model.id, "running", external_port)
+        return result, False
+
+    def _hedge_delay(self, model) -> Optional[float]:
+        """Seconds before a request is hedged to a second replica: the p95 of the model's replica calls (None = no hedging)"""
+        if not settings.HEDGE_ENABLED or len(container_manager.get_model_containers(model.id)) < 2:
+            return None
+        if replica_latency.sample_count(model.id) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        return max(replica_latency.p95(model.id), settings.HEDGE_MIN_DELAY_MS / 1000.0)
+
+    async def _predict_on(self, model, container_id: str, input_data: dict, timeout: Optional[float]) -> dict:
+        client = container_manager.get_http_client(container_id)
+        if client is None:
+            raise NoReplicaAvailableError(f"Container {container_id[:12]} of model {model.id} is not running")
+        return await self.predict(model, container_id, client, input_data, timeout)
+
+    async def predict(self, model, container_id: str, client: httpx.AsyncClient, input_data: dict,
+                      timeout: Optional[float] = None) -> dict:
+        """Call the model (micro-batched if it supports batching); `timeout` overrides INFERENCE_TIMEOUT"""
+        if settings.BATCHING_ENABLED and model.supports_batching:
+            return await micro_batcher.submit(container_id, client, input_data, timeout)
+
+        logger.info(f"Sending inference request to {client.base_url}predict")
+        if timeout is not None:
+            response = await client.post("/predict", json=input_data, timeout=httpx.Timeout(
+                timeout, connect=settings.MODEL_HTTP_CONNECT_TIMEOUT
+            ))
+        else:
+            response = await client.post("/predict", json=input_data)
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Model returned error: {response.text}"
+            )
+
+        return response.json()
+
+    async def open_stream(self, model, input_data: dict) -> InferenceStream:
+        """Start a streamed inference; the caller must consume or close it"""
+        stream = InferenceStream(model, settings.STREAM_PATH, json=input_data)
+        await stream.open(self)
+        self.streams_started += 1
+        return stream
+
+    async def open_raw(self, model, body: AsyncIterator[bytes], headers: dict) -> InferenceStream:
+        """
+        Forward an undecoded request body to the model's RAW_PATH
+        The body is streamed to the container as it arrives and the answer
+        streamed back; neither is parsed here.
+        """
+        self.raw_requests += 1
+        stream = InferenceStream(model, settings.RAW_PATH, kind='raw', content=self._count_raw(body), headers=headers)
+        await stream.open(self)
+        return stream
+
+    async def _count_raw(self, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Pass body chunks on, enforcing RAW_MAX_BODY_MB for bodies without Content-Length"""
+        limit = settings.RAW_MAX_BODY_MB * 1024 * 1024
+        size = 0
+        async for chunk in body:
+            size += len(chunk)
+            if size > limit:
+                raise HTTPException(status_code=413, detail=f"Request body exceeds {settings.RAW_MAX_BODY_MB}MB")
+            yield chunk
+        self.raw_bytes_in += size
+
+    def get_stats(self) -> dict:
+        """Get streaming and raw passthrough statistics"""
+        return {
+            'streams_started': self.streams_started,
+            'streams_completed': self.streams_completed,
+            'active_streams': self.active_streams,
+            'stream_bytes': self.stream_bytes,
+            'raw_requests': self.raw_requests,
+            'raw_completed': self.raw_completed,
+            'raw_bytes_in': self.raw_bytes_in,
+            'raw_bytes_out': self.raw_bytes_out
+        }
+
+# Global instance
+inference_dispatcher = InferenceDispatcher()
@@ -0,0 +1,208 @@
+import time
+import queue
+import logging
+import asyncio
+import threading
+from typing import Dict, Iterator, List, Optional, Set
+from ..config import settings
+from .container_manager import container_manager, MANAGED_LABEL, REPLICA_LABEL
+from .registry_cache import registry_cache
+from .model_service import ModelService
+from .reconciler import container_reconciler
+
+logger = logging.getLogger(__name__)
+
+# Container events that change what we can route to
+WATCHED_EVENTS = ('start', 'die', 'stop', 'oom')
+
+class DockerEventSource:
+    """Container events from the Docker daemon (blocking iterator)"""
+
+    def __init__(self, client):
+        self.client = client
+        self.stream = None
+
+    def events(self, since: Optional[int] = None) -> Iterator[dict]:
+        self.stream = self.client.events(
+            since=since,
+            decode=True,
+            filters={'type': 'container', 'event': list(WATCHED_EVENTS)}
+        )
+        return self.stream
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+
+class FakeEventSource:
+    """
+    In-memory event source for tests and runs without Docker
+    Events are emitted in the Docker API shape.
+    """
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+
+    def emit(self, action: str, container_id: str, **attributes):
+        self.queue.put({
+            'Type': 'container',
+            'Action': action,
+            'Actor': {'ID': container_id, 'Attributes': attributes},
+            'time': int(time.time())
+        })
+
+    def events(self, since: Optional[int] = None) -> Iterator[dict]:
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.queue.put(None)
+
+class DockerEventWatcher:
+    """
+    Keeps container state current from the Docker event stream
+    - Each Docker host's blocking stream is read in a daemon thread, off
+      the event loop
+    - Events are handed to the loop and applied in order by one task
+    - die/stop: the container is dropped from routing at once and the
+      model's registry status is corrected when nothing is left running
+    - start: model containers started outside this service are adopted
+      once they answer the readiness probe
+    """
+
+    def __init__(self, sources: Optional[Dict[str, object]] = None):
+        self.sources: Dict[str, object] = sources or {}  # host name: event source
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.events: Optional[asyncio.Queue] = None
+        self.threads: List[threading.Thread] = []
+        self.task: Optional[asyncio.Task] = None
+        self.adopting: Set[asyncio.Task] = set()  # adoptions waiting for readiness, referenced until done
+        self.running = False
+        self.since: Dict[str, Optional[int]] = {}  # host name: last event time
+        self.counts: Dict[str, int] = {}
+        self.crashes = 0
+        self.ooms = 0
+        self.reconnects = 0
+
+    def start(self, since: Optional[int] = None):
+        """Start reading events (those since `since`, a unix time, are replayed)"""
+        if not self.sources:
+            hosts = container_manager.pool.available_hosts()
+            if not hosts:
+                logger.warning("Docker client not available, container events are not watched")
+                return
+            self.sources = {host.name: DockerEventSource(host.client) for host in hosts}
+
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+        self.since = {name: since for name in self.sources}
+        self.running = True
+        self.task = asyncio.create_task(self.consume())
+        self.threads = [
+            threading.Thread(target=self._read, args=(name,), name=f"docker-events-{name}", daemon=True)
+            for name in self.sources
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for source in self.sources.values():
+            source.close()
+        if self.task:
+            self.task.cancel()
+        for task in self.adopting:
+            task.cancel()
+
+    def _read(self, host_name: str):
+        """Thread: forward one host's events to the loop, reconnecting on errors"""
+        source = self.sources[host_name]
+        while self.running:
+            try:
+                for event in source.events(since=self.since[host_name]):
+                    # Resume from here if the stream has to be reopened
+                    self.since[host_name] = event.get('time', self.since[host_name])
+                    self.loop.call_soon_threadsafe(self.events.put_nowait, (host_name, event))
+                if isinstance(source, FakeEventSource):
+                    return
+            except Exception as e:
+                if not self.running:
+                    return
+                logger.error(f"Docker event stream of {host_name} failed, reconnecting: {e}")
+            if self.running:
+                self.reconnects += 1
+                time.sleep(settings.DOCKER_EVENTS_RETRY_DELAY)
+
+    async def consume(self):
+        while True:
+            host_name, event = await self.events.get()
+            try:
+                await self.handle(event, host_name)
+            except Exception as e:
+                logger.error(f"Failed to apply Docker event {event.get('Action')} from {host_name}: {e}")
+
+    async def handle(self, event: dict, host_name: Optional[str] = None):
+        """Apply one container event from a Docker host (default host if not given)"""
+        action = event.get('Action') or event.get('status')
+        actor = event.get('Actor') or {}
+        container_id = actor.get('ID') or event.get('id')
+        attributes = actor.get('Attributes') or {}
+        if action not in WATCHED_EVENTS or not container_id:
+            return
+        self.counts[action] = self.counts.get(action, 0) + 1
+
+        if action == 'oom':
+            self.ooms += 1
+            logger.warning(f"Container {container_id[:12]} ran out of memory")
+            return
+
+        if action in ('die', 'stop'):
+            model_id = await container_manager.container_gone(container_id)
+            if model_id is not None:
+                if action == 'die' and attributes.get('exitCode', '0') != '0':
+                    self.crashes += 1
+                logger.warning(
+                    f"Container {container_id[:12]} of model {model_id} {action} "
+                    f"(exit code {attributes.get('exitCode', '?')}), no longer routed"
+                )
+            else:
+                model = registry_cache.get_by_container(container_id)
+                model_id = model.id if model is not None else None
+
+            # Also catches containers we stopped ourselves (e.g. idle cleanup)
+            if model_id is not None and not container_manager.has_model_containers(model_id):
+                model = registry_cache.by_id.get(model_id)
+                if model is not None and model.status == 'running':
+                    ModelService.queue_status_update(model_id, "available", None)
+            return
+
+        # start: our own starts, paused containers and replicas are tracked by the container manager
+        if (
+            container_manager.is_container_running(container_id)
+            or container_id in container_manager.paused_containers
+            or container_id in container_manager.starting
+            or attributes.get(REPLICA_LABEL) == 'true'
+        ):
+            return
+        if MANAGED_LABEL in attributes or registry_cache.get_by_container(container_id) is not None:
+            host = container_manager.pool.get(host_name) or container_manager.pool.default
+            task = asyncio.create_task(container_reconciler.adopt_started(container_id, host))
+            self.adopting.add(task)
+            task.add_done_callback(self.adopting.discard)
+
+    def get_stats(self) -> dict:
+        """Get event statistics"""
+        return {
+            'enabled': settings.DOCKER_EVENTS_ENABLED,
+            'watching': sorted(name for name, thread in zip(self.sources, self.threads) if self.running and thread.is_alive()),
+            'events': dict(self.counts),
+            'crashes': self.crashes,
+            'ooms': self.ooms,
+            'reconnects': self.reconnects
+        }
+
+# Global instance
+docker_event_watcher = DockerEventWatcher()
@@ -0,0 +1,245 @@
+import docker
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from ..config import settings
+from .async_docker import AsyncDocker
+
+logger = logging.getLogger(__name__)
+
+class DockerHost:
+    """
+    One Docker daemon and the model containers resident on it
+    - CPU/memory budget: the containers' requests must fit in it (by
+      default HOST_RESOURCE_FRACTION of what the daemon reports)
+    - Optional container count cap (max_containers, 0 = none)
+    """
+
+    def __init__(self, name: str, url: str, address: str, max_containers: int, client=None,
+                 cpus: Optional[float] = None, memory_mb: Optional[float] = None):
+        self.name = name
+        self.url = url
+        self.address = address  # where its containers' published ports are reached
+        self.local = urlparse(url).scheme in ('', 'unix', 'npipe')  # same machine: socket volumes are shared
+        self.max_containers = max_containers
+        self.client = client if client is not None else self._connect()
+        self.docker = AsyncDocker(self.client)
+        self.containers: Dict[str, Tuple[float, float]] = {}  # running or paused container id: (cpus, memory_mb) requested
+        self.placements = 0
+        detected_cpus, detected_memory_mb = self._detect_resources()
+        self.cpus = cpus or detected_cpus  # 0 = unknown, not enforced
+        self.memory_mb = memory_mb or detected_memory_mb
+
+    def _connect(self):
+        try:
+            client = docker.DockerClient(base_url=self.url)
+            client.ping()
+            logger.info(f"Docker host {self.name} connected ({self.url})")
+            return client
+        except Exception as e:
+            logger.error(f"Failed to connect to Docker host {self.name} ({self.url}): {e}")
+            return None
+
+    def _detect_resources(self) -> Tuple[float, float]:
+        """Share of the daemon's CPUs and memory (MB) given to model containers"""
+        if self.client is None:
+            return 0.0, 0.0
+        try:
+            info = self.client.info()
+            fraction = settings.HOST_RESOURCE_FRACTION
+            return info['NCPU'] * fraction, info['MemTotal'] / (1024 * 1024) * fraction
+        except Exception as e:
+            logger.warning(f"Could not read resources of Docker host {self.name}: {e}")
+            return 0.0, 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    @property
+    def reserved_cpus(self) -> float:
+        return sum(cpus for cpus, _ in self.containers.values())
+
+    @property
+    def reserved_memory_mb(self) -> float:
+        return sum(memory_mb for _, memory_mb in self.containers.values())
+
+    def load(self) -> float:
+        """Fraction of this host's budget in use (the scarcest of CPU, memory and slots)"""
+        fractions = [0.0]
+        if self.cpus:
+            fractions.append(self.reserved_cpus / self.cpus)
+        if self.memory_mb:
+            fractions.append(self.reserved_memory_mb / self.memory_mb)
+        if self.max_containers:
+            fractions.append(len(self.containers) / self.max_containers)
+        return max(fractions)
+
+    def has_room(self, cpus: float = 0.0, memory_mb: float = 0.0) -> bool:
+        """Whether a container requesting `cpus` / `memory_mb` fits next to the resident ones"""
+        if not self.available:
+            return False
+        if self.max_containers and len(self.containers) >= self.max_containers:
+            return False
+        if self.cpus and self.reserved_cpus + cpus > self.cpus:
+            return False
+        if self.memory_mb and self.reserved_memory_mb + memory_mb > self.memory_mb:
+            return False
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            'url': self.url,
+            'address': self.address,
+            'available': self.available,
+            'containers': len(self.containers),
+            'max_containers': self.max_containers,
+            'cpus': round(self.cpus, 2),
+            'reserved_cpus': round(self.reserved_cpus, 2),
+            'memory_mb': round(self.memory_mb),
+            'reserved_memory_mb': round(self.reserved_memory_mb),
+            'load': round(self.load(), 3),
+            'placements': self.placements,
+            'docker': self.docker.get_stats()
+        }
+
+class PlacementStrategy(ABC):
+    """Picks the host for a new container among hosts with room"""
+    name = "base"
+
+    @abstractmethod
+    def choose(self, hosts: List[DockerHost]) -> DockerHost:
+        raise NotImplementedError
+
+class LeastLoadedPlacement(PlacementStrategy):
+    """Spread: the host with the lowest fraction of slots in use"""
+    name = "least_loaded"
+
+    def choose(self, hosts):
+        return min(hosts, key=lambda host: (host.load(), host.placements))
+
+class BinPackPlacement(PlacementStrategy):
+    """Pack: the fullest host that still has room, so other hosts stay empty"""
+    name = "binpack"
+
+    def choose(self, hosts):
+        return max(hosts, key=lambda host: (host.load(), -host.placements))
+
+STRATEGIES = {strategy.name: strategy for strategy in (LeastLoadedPlacement, BinPackPlacement)}
+
+def build_strategy(name: str) -> PlacementStrategy:
+    strategy = STRATEGIES.get(name.lower())
+    if strategy is None:
+        logger.warning(f"Unknown placement strategy '{name}', using least_loaded")
+        strategy = LeastLoadedPlacement
+    return strategy()
+
+def host_address(url: str) -> str:
+    """Address that reaches containers published by the daemon at `url`"""
+    parsed = urlparse(url)
+    if parsed.scheme in ('', 'unix', 'npipe') or not parsed.hostname:
+        return settings.DOCKER_LOCAL_ADDRESS
+    return parsed.hostname
+
+class DockerPool:
+    """
+    Docker daemons model containers run on
+    - New containers are placed by a strategy (least_loaded or binpack)
+      over hosts whose CPU/memory budget fits their requests
+    - Existing containers (created by the upload service) are located
+      once on whichever host has them and remembered
+    - Inference is routed to host address:port of the container's host
+    """
+
+    def __init__(self, hosts: List[DockerHost], strategy: PlacementStrategy):
+        self.hosts: Dict[str, DockerHost] = {host.name: host for host in hosts}
+        self.strategy = strategy
+        self.locations: Dict[str, str] = {}  # container_id: host name
+
+    @property
+    def default(self) -> DockerHost:
+        """First configured host"""
+        return next(iter(self.hosts.values()))
+
+    def available_hosts(self) -> List[DockerHost]:
+        return [host for host in self.hosts.values() if host.available]
+
+    def get(self, name: Optional[str]) -> Optional[DockerHost]:
+        return self.hosts.get(name) if name is not None else None
+
+    def host_of(self, container_id: str) -> Optional[DockerHost]:
+        """Host a known container lives on"""
+        return self.get(self.locations.get(container_id))
+
+    def place(self, cpus: float = 0.0, memory_mb: float = 0.0) -> Optional[DockerHost]:
+        """Host for a new container requesting `cpus` / `memory_mb`; None when it fits nowhere"""
+        candidates = [host for host in self.hosts.values() if host.has_room(cpus, memory_mb)]
+        if not candidates:
+            return None
+        host = self.strategy.choose(candidates)
+        host.placements += 1
+        return host
+
+    def has_room(self, cpus: float = 0.0, memory_mb: float = 0.0) -> bool:
+        return any(host.has_room(cpus, memory_mb) for host in self.hosts.values())
+
+    def assign(self, container_id: str, host: DockerHost, cpus: float = 0.0, memory_mb: float = 0.0):
+        """Reserve a running or paused container's requests on its host"""
+        self.locations[container_id] = host.name
+        host.containers[container_id] = (cpus, memory_mb)
+
+    def release(self, container_id: str):
+        """Free the reservation of a stopped container (its location is kept)"""
+        host = self.host_of(container_id)
+        if host is not None:
+            host.containers.pop(container_id, None)
+
+    def forget(self, container_id: str):
+        """Drop a removed container (e.g. a replica run with auto_remove)"""
+        self.release(container_id)
+        self.locations.pop(container_id, None)
+
+    async def locate(self, container_id: str) -> Optional[DockerHost]:
+        """Find the host holding a container (all hosts are asked in parallel)"""
+        host = self.host_of(container_id)
+        if host is not None:
+            return host
+
+        hosts = self.available_hosts()
+        results = await asyncio.gather(
+            *[host.docker.get(container_id) for host in hosts],
+            return_exceptions=True
+        )
+        for host, result in zip(hosts, results):
+            if not isinstance(result, Exception):
+                self.locations[container_id] = host.name
+                return host
+        return None
+
+    def shutdown(self):
+        for host in self.hosts.values():
+            host.docker.shutdown()
+
+    def get_stats(self) -> dict:
+        """Get per-host placement statistics"""
+        return {
+            'strategy': self.strategy.name,
+            'hosts': {name: host.get_stats() for name, host in self.hosts.items()}
+        }
+
+def build_docker_pool() -> DockerPool:
+    default_capacity = settings.DOCKER_HOST_DEFAULT_CAPACITY or settings.MAX_RUNNING_CONTAINERS
+    hosts = [
+        DockerHost(
+            name,
+            url,
+            host_address(url),
+            int(settings.DOCKER_HOST_CAPACITY.get(name, default_capacity)),
+            cpus=settings.DOCKER_HOST_CPUS.get(name),
+            memory_mb=settings.DOCKER_HOST_MEMORY_MB.get(name)
+        )
+        for name, url in settings.DOCKER_HOSTS.items()
+    ]
+    return DockerPool(hosts, build_strategy(settings.PLACEMENT_STRATEGY))
@@ -0,0 +1,216 @@
+import time
+import heapq
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class EvictionEntry:
+    """Eviction bookkeeping for one running container"""
+
+    def __init__(self, model_id: int, cost: float, size: float, idle_timeout: float, group: Optional[str] = None):
+        self.model_id = model_id
+        self.group = group  # e.g. the Docker host; victims can be picked within one group
+        self.cost = cost  # seconds to bring the model back (measured time-to-ready)
+        self.size = size  # MB of memory held
+        self.hits = 0
+        self.last_used = time.monotonic()
+        self.idle_timeout = idle_timeout
+        self.priority = 0.0
+
+    @property
+    def deadline(self) -> float:
+        return self.last_used + self.idle_timeout
+
+class EvictionPolicy(ABC):
+    """Decides which container to stop first: lower priority = evicted first"""
+    name = "base"
+
+    @abstractmethod
+    def priority(self, entry: EvictionEntry, clock: float) -> float:
+        raise NotImplementedError
+
+class LRUPolicy(EvictionPolicy):
+    """Least recently used"""
+    name = "lru"
+
+    def priority(self, entry: EvictionEntry, clock: float) -> float:
+        return entry.last_used
+
+class CostAwarePolicy(EvictionPolicy):
+    """
+    GreedyDual-Size-Frequency: priority = clock + hits * cost / size
+    Models that are slow to restart, busy and small stay warm; the clock
+    ages out entries that stop being used.
+    """
+    name = "cost"
+
+    def priority(self, entry: EvictionEntry, clock: float) -> float:
+        cost = max(entry.cost, 0.1)
+        size = max(entry.size, 1.0)
+        return clock + max(entry.hits, 1) * cost / size
+
+POLICIES = {policy.name: policy for policy in (LRUPolicy, CostAwarePolicy)}
+
+def build_policy(name: str) -> EvictionPolicy:
+    policy = POLICIES.get(name.lower())
+    if policy is None:
+        logger.warning(f"Unknown eviction policy '{name}', using lru")
+        policy = LRUPolicy
+    return policy()
+
+class EvictionEngine:
+    """
+    Heap-indexed eviction and idle expiry
+    - Victim choice and idle expiry are O(log n) amortized
+    - Victims are indexed per group, so picking one within a group does
+      not wade through the others
+    - Touches are O(1): heap entries are refreshed lazily when they
+      reach the top (priorities and deadlines only grow on use)
+    """
+
+    def __init__(self, policy: EvictionPolicy):
+        self.policy = policy
+        self.entries: Dict[str, EvictionEntry] = {}  # container_id: entry
+        self.victims: Dict[Optional[str], List[Tuple[float, str]]] = {}  # group: heap of (priority, container_id)
+        self.expiry: List[Tuple[float, str]] = []  # (idle deadline, container_id)
+        self.clock = 0.0  # GreedyDual inflation value
+        self.evictions = 0
+
+    def add(self, container_id: str, model_id: int, cost: float, size: float, idle_timeout: float,
+            group: Optional[str] = None):
+        self.attach(container_id, EvictionEntry(model_id, cost, size, idle_timeout, group))
+
+    def attach(self, container_id: str, entry: EvictionEntry):
+        """Index an existing entry (e.g. one moved over from another engine)"""
+        entry.priority = self.policy.priority(entry, self.clock)
+        self.entries[container_id] = entry
+        heapq.heappush(self.victims.setdefault(entry.group, []), (entry.priority, container_id))
+        heapq.heappush(self.expiry, (entry.deadline, container_id))
+
+    def remove(self, container_id: str) -> Optional[EvictionEntry]:
+        # Heap entries for the container are skipped when they surface
+        return self.entries.pop(container_id, None)
+
+    def touch(self, container_id: str, hit: bool = True):
+        """Record use of a container"""
+        entry = self.entries.get(container_id)
+        if entry is None:
+            return
+        entry.last_used = time.monotonic()
+        if hit:
+            entry.hits += 1
+        entry.priority = self.policy.priority(entry, self.clock)
+
+    def update(self, container_id: str, cost: Optional[float] = None, size: Optional[float] = None,
+               idle_timeout: Optional[float] = None):
+        """Change inputs that may lower priority or deadline (re-indexed at once)"""
+        entry = self.entries.get(container_id)
+        if entry is None:
+            return
+        if cost is not None:
+            entry.cost = cost
+        if size is not None:
+            entry.size = size
+        if idle_timeout is not None:
+            entry.idle_timeout = idle_timeout
+        entry.priority = self.policy.priority(entry, self.clock)
+        heapq.heappush(self.victims.setdefault(entry.group, []), (entry.priority, container_id))
+        heapq.heappush(self.expiry, (entry.deadline, container_id))
+
+    def pick_victim(self, exclude: Iterable[str] = (), group: Optional[str] = None) -> Optional[str]:
+        """
+        Container that should be stopped next (not removed until remove())
+        With `group`, only that group's containers are considered.
+        """
+        excluded = set(exclude)
+        groups = [group] if group is not None else list(self.victims)
+        best = None
+        for name in groups:
+            candidate = self._lowest(self.victims.get(name, []), excluded)
+            if candidate is not None and (best is None or candidate < best):
+                best = candidate
+
+        self._compact()
+        if best is None:
+            return None
+        self.clock = max(self.clock, best[0])
+        return best[1]
+
+    def _lowest(self, heap: List[Tuple[float, str]], excluded: Set[str]) -> Optional[Tuple[float, str]]:
+        """Lowest current (priority, container_id) in one victim heap, left indexed"""
+        skipped = []
+        lowest = None
+
+        while heap:
+            priority, container_id = heapq.heappop(heap)
+            entry = self.entries.get(container_id)
+            if entry is None:
+                continue
+            if priority < entry.priority:
+                # Stale: the container was used since this was pushed
+                heapq.heappush(heap, (entry.priority, container_id))
+                continue
+            if priority > entry.priority:
+                # Superseded by a lower entry pushed by update()
+                continue
+            # Keep it indexed until the caller actually removes it
+            skipped.append((priority, container_id))
+            if container_id in excluded:
+                continue
+            lowest = (priority, container_id)
+            break
+
+        for item in skipped:
+            heapq.heappush(heap, item)
+        return lowest
+
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """Containers idle past their deadline (not removed until remove())"""
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        while self.expiry and self.expiry[0][0] <= now:
+            deadline, container_id = heapq.heappop(self.expiry)
+            entry = self.entries.get(container_id)
+            if entry is None or deadline > entry.deadline or container_id in expired:
+                # Gone, superseded by an earlier deadline, or a duplicate
+                continue
+            if entry.deadline > now:
+                heapq.heappush(self.expiry, (entry.deadline, container_id))
+                continue
+            expired.append(container_id)
+
+        # Keep them indexed so a failed stop is retried on the next pass
+        for container_id in expired:
+            heapq.heappush(self.expiry, (self.entries[container_id].deadline, container_id))
+        self._compact()
+        return expired
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest idle deadline currently indexed (may be stale-early)"""
+        return self.expiry[0][0] if self.expiry else None
+
+    def _compact(self):
+        """Rebuild heaps when lazy deletion lets them grow too large"""
+        limit = 4 * len(self.entries) + 64
+        if sum(len(heap) for heap in self.victims.values()) > limit:
+            self.victims = {}
+            for cid, e in self.entries.items():
+                self.victims.setdefault(e.group, []).append((e.priority, cid))
+            for heap in self.victims.values():
+                heapq.heapify(heap)
+        for name in [name for name, heap in self.victims.items() if not heap]:
+            del self.victims[name]
+        if len(self.expiry) > limit:
+            self.expiry = [(e.deadline, cid) for cid, e in self.entries.items()]
+            heapq.heapify(self.expiry)
+
+    def get_stats(self) -> dict:
+        return {
+            'policy': self.policy.name,
+            'tracked': len(self.entries),
+            'evictions': self.evictions,
+            'clock': round(self.clock, 4)
+        }
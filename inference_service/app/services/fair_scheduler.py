@@ -0,0 +1,169 @@
+import math
+import time
+import heapq
+import logging
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Tuple
+from ..config import settings
+from .admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+class TenantState:
+    """Scheduling, rate-limit and wait-time bookkeeping for one tenant"""
+
+    def __init__(self, rate: float):
+        self.last_finish = 0.0  # virtual finish tag of the tenant's last request
+        self.rate = rate  # requests/second (0 = unlimited)
+        self.tokens = rate * settings.TENANT_RATE_BURST
+        self.refilled_at = time.monotonic()
+        self.queued = 0
+        self.dispatched = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=settings.LATENCY_WINDOW)
+
+class FairScheduler:
+    """
+    Weighted fair queueing across tenants in front of container dispatch
+    - FAIR_SCHEDULER_CONCURRENCY dispatch slots are shared by all tenants
+    - When slots are busy, waiting requests are served in order of their
+      virtual finish tag (start + 1/weight), so each backlogged tenant
+      gets throughput in proportion to its weight
+    - Optional per-tenant token-bucket rate limit (429 with Retry-After)
+    """
+
+    def __init__(self):
+        self.tenants: Dict[str, TenantState] = {}
+        self.virtual_time = 0.0
+        self.in_flight = 0
+        # (finish_tag, seq, start_tag, tenant, enqueued_at, future)
+        self.queue: List[Tuple[float, int, float, str, float, asyncio.Future]] = []
+        self.seq = 0
+
+    def weight(self, tenant: str) -> float:
+        return max(settings.TENANT_WEIGHTS.get(tenant, settings.TENANT_DEFAULT_WEIGHT), 1e-6)
+
+    def _tenant(self, tenant: str) -> TenantState:
+        state = self.tenants.get(tenant)
+        if state is None:
+            state = TenantState(settings.TENANT_RATE_LIMITS.get(tenant, settings.TENANT_DEFAULT_RATE_LIMIT))
+            self.tenants[tenant] = state
+        return state
+
+    def check_rate(self, tenant: str):
+        """Take one token from the tenant's bucket or raise AdmissionRejected (429)"""
+        state = self._tenant(tenant)
+        if state.rate <= 0:
+            return
+
+        now = time.monotonic()
+        capacity = state.rate * settings.TENANT_RATE_BURST
+        state.tokens = min(capacity, state.tokens + (now - state.refilled_at) * state.rate)
+        state.refilled_at = now
+
+        if state.tokens < 1:
+            state.rate_limited += 1
+            retry_after = max(1, math.ceil((1 - state.tokens) / state.rate))
+            raise AdmissionRejected(429, f"Rate limit exceeded for tenant {tenant}", retry_after)
+        state.tokens -= 1
+
+    def _tags(self, tenant: str, state: TenantState) -> Tuple[float, float]:
+        start = max(self.virtual_time, state.last_finish)
+        finish = start + 1.0 / self.weight(tenant)
+        state.last_finish = finish
+        return start, finish
+
+    @asynccontextmanager
+    async def slot(self, tenant: str) -> AsyncIterator[None]:
+        """Hold one shared dispatch slot, granted in weighted-fair order"""
+        state = self._tenant(tenant)
+        start, finish = self._tags(tenant, state)
+        enqueued_at = time.monotonic()
+
+        # Drop waiters that timed out or were cancelled at the head of the queue
+        while self.queue and self.queue[0][5].done():
+            heapq.heappop(self.queue)
+
+        if self.in_flight < settings.FAIR_SCHEDULER_CONCURRENCY and not self.queue:
+            self.in_flight += 1
+            self.virtual_time = start
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.seq += 1
+            heapq.heappush(self.queue, (finish, self.seq, start, tenant, enqueued_at, waiter))
+            state.queued += 1
+            try:
+                # The slot is handed over by _release (in_flight already counted)
+                await asyncio.wait_for(waiter, settings.FAIR_SCHEDULER_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if not waiter.done() or waiter.cancelled():
+                    state.queued -= 1
+                    state.timed_out += 1
+                    raise AdmissionRejected(
+                        503,
+                        f"Tenant {tenant} waited longer than {settings.FAIR_SCHEDULER_QUEUE_TIMEOUT}s for dispatch",
+                        max(1, math.ceil(settings.FAIR_SCHEDULER_QUEUE_TIMEOUT / 2))
+                    )
+            except asyncio.CancelledError:
+                state.queued -= 1
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+            state.queued -= 1
+
+        waited = time.monotonic() - enqueued_at
+        state.dispatched += 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        state.recent_waits.append(waited)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        """Free a slot and grant it to the waiter with the smallest finish tag"""
+        self.in_flight -= 1
+        while self.queue and self.in_flight < settings.FAIR_SCHEDULER_CONCURRENCY:
+            _, _, start, _, _, waiter = heapq.heappop(self.queue)
+            if waiter.done():
+                # Timed out or cancelled while queued
+                continue
+            self.virtual_time = max(self.virtual_time, start)
+            self.in_flight += 1
+            waiter.set_result(True)
+
+    def get_stats(self) -> dict:
+        """Get per-tenant scheduling statistics"""
+        tenants = {}
+        for tenant, state in self.tenants.items():
+            waits = sorted(state.recent_waits)
+            p95 = waits[max(math.ceil(0.95 * len(waits)) - 1, 0)] if waits else 0.0
+            tenants[tenant] = {
+                'weight': self.weight(tenant),
+                'rate_limit': state.rate,
+                'queued': state.queued,
+                'dispatched': state.dispatched,
+                'rate_limited': state.rate_limited,
+                'timed_out': state.timed_out,
+                'avg_wait': round(state.total_wait / state.dispatched, 4) if state.dispatched else 0,
+                'p95_wait': round(p95, 4),
+                'max_wait': round(state.max_wait, 4)
+            }
+
+        return {
+            'enabled': settings.FAIR_SCHEDULER_ENABLED,
+            'concurrency': settings.FAIR_SCHEDULER_CONCURRENCY,
+            'in_flight': self.in_flight,
+            'queued': sum(state.queued for state in self.tenants.values()),
+            'tenants': tenants
+        }
+
+# Global instance
+fair_scheduler = FairScheduler()
@@ -0,0 +1,92 @@
+import httpx
+import asyncio
+import logging
+from typing import Dict, Optional, Set, Tuple
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class HttpClientPool:
+    """
+    Keep-alive HTTP connection pools for model containers
+    - One httpx.AsyncClient per running container, over TCP or a unix socket
+    - Pools are opened lazily and closed when the container stops
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}  # container_id: client
+        self.endpoints: Dict[str, Tuple[str, Optional[str]]] = {}  # container_id: (base_url, socket path)
+        self.closing: Set[asyncio.Task] = set()  # stale pools being closed in the background
+
+    def _build_client(self, base_url: str, uds: Optional[str] = None) -> httpx.AsyncClient:
+        """Create a pooled client for a single container"""
+        limits = httpx.Limits(
+            max_connections=settings.MODEL_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MODEL_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MODEL_HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(
+            settings.INFERENCE_TIMEOUT,
+            connect=settings.MODEL_HTTP_CONNECT_TIMEOUT
+        )
+        if uds:
+            transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits)
+            return httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout)
+        return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+    def get_client(self, container_id: str, port: int, address: Optional[str] = None,
+                   uds: Optional[str] = None) -> httpx.AsyncClient:
+        """Get (or open) the connection pool for a container at `address`:`port` (or unix socket `uds`)"""
+        base_url = f"http://{address or settings.DOCKER_LOCAL_ADDRESS}:{port}"
+        endpoint = (base_url, uds)
+        client = self.clients.get(container_id)
+
+        # Container was restarted on a different host, port or socket - drop the stale pool
+        if client is not None and self.endpoints.get(container_id) != endpoint:
+            self.clients.pop(container_id, None)
+            self._close_later(container_id, client)
+            client = None
+
+        if client is None:
+            client = self._build_client(base_url, uds)
+            self.clients[container_id] = client
+            self.endpoints[container_id] = endpoint
+            logger.info(f"Opened HTTP pool for container {container_id[:12]} ({uds or base_url})")
+
+        return client
+
+    def _close_later(self, container_id: str, client: httpx.AsyncClient):
+        """Close a replaced pool in the background (get_client is called synchronously)"""
+        task = asyncio.create_task(self._close(container_id, client))
+        self.closing.add(task)
+        task.add_done_callback(self.closing.discard)
+
+    async def close_client(self, container_id: str):
+        """Close the connection pool for a container"""
+        client: Optional[httpx.AsyncClient] = self.clients.pop(container_id, None)
+        self.endpoints.pop(container_id, None)
+        if client is None:
+            return
+        await self._close(container_id, client)
+
+    async def _close(self, container_id: str, client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+            logger.info(f"Closed HTTP pool for container {container_id[:12]}")
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP pool for {container_id[:12]}: {e}")
+
+    async def close_all(self):
+        """Close every open connection pool"""
+        for container_id in list(self.clients.keys()):
+            await self.close_client(container_id)
+        if self.closing:
+            await asyncio.gather(*self.closing, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """Get connection pool statistics"""
+        return {
+            'open_pools': len(self.clients),
+            'max_connections_per_pool': settings.MODEL_HTTP_MAX_CONNECTIONS,
+            'max_keepalive_per_pool': settings.MODEL_HTTP_MAX_KEEPALIVE
+        }
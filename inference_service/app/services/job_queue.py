@@ -0,0 +1,262 @@
+import math
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from ..config import settings
+from .admission import AdmissionRejected
+from .dispatcher import inference_dispatcher, as_http_error
+
+logger = logging.getLogger(__name__)
+
+class InferenceJob:
+    """One submitted inference and, once finished, its outcome"""
+
+    FINISHED = ('succeeded', 'failed', 'cancelled')
+
+    def __init__(self, model, input_data: dict):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.input_data = input_data
+        self.status = 'queued'  # queued | running | succeeded | failed | cancelled
+        self.result: Optional[Any] = None
+        self.cached = False
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+        self.attempts = 0
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None  # monotonic; set when finished
+        self.task: Optional[asyncio.Task] = None
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED
+
+    def finish(self, status: str, result: Any = None, error_status: Optional[int] = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error_status = error_status
+        self.error = error
+        self.finished_at = time.time()
+        self.expires_at = time.monotonic() + settings.JOB_RESULT_TTL
+        self.done.set()
+
+    def to_dict(self, include_result: bool = False) -> dict:
+        info = {
+            'job_id': self.id,
+            'model_id': self.model.id,
+            'model_name': self.model.model_name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.started_at is not None:
+            info['queue_time'] = self.started_at - self.submitted_at
+        if self.finished_at is not None and self.started_at is not None:
+            info['inference_time'] = self.finished_at - self.started_at
+        if self.status == 'failed':
+            info['error_status'] = self.error_status
+            info['error'] = self.error
+        if include_result and self.status == 'succeeded':
+            info['result'] = self.result
+            info['cached'] = self.cached
+        return info
+
+class JobQueue:
+    """
+    Asynchronous (submit / poll / fetch) inference jobs
+    - Jobs wait in a bounded in-process queue (JOB_QUEUE_MAX_SIZE); a full
+      queue refuses new jobs with 503 + Retry-After
+    - JOB_WORKERS dispatchers run them through the same path as /infer
+      (result cache, admission, fair share, routing, micro-batching), with
+      JOB_TIMEOUT instead of INFERENCE_TIMEOUT
+    - Jobs refused by admission control are retried after Retry-After
+      until JOB_TIMEOUT
+    - Finished jobs are kept for JOB_RESULT_TTL seconds; pollers can
+      long-poll (up to JOB_MAX_WAIT) instead of polling in a loop
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.jobs: Dict[str, InferenceJob] = {}
+        self.finished: Deque[str] = deque()  # job ids in finishing (= expiry) order
+        self.workers: List[asyncio.Task] = []
+        self.avg_run_time = 1.0  # EWMA of job run time, for Retry-After
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.retries = 0
+        self.expired = 0
+
+    @property
+    def running(self) -> bool:
+        return self.queue is not None
+
+    async def start(self):
+        """Start the dispatcher pool"""
+        self.queue = asyncio.Queue(maxsize=settings.JOB_QUEUE_MAX_SIZE)
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(settings.JOB_WORKERS)]
+
+    async def stop(self):
+        """Stop the dispatchers and cancel unfinished jobs"""
+        for job in list(self.jobs.values()):
+            if not job.finished:
+                self.cancel(job)
+        for task in self.workers:
+            task.cancel()
+        self.workers = []
+
+    def submit(self, model, input_data: dict) -> InferenceJob:
+        """
+        Queue a job
+        Raises: AdmissionRejected when the queue is full
+        """
+        self._expire()
+        job = InferenceJob(model, input_data)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise AdmissionRejected(503, "Job queue is full", self.retry_after())
+
+        self.jobs[job.id] = job
+        self.submitted += 1
+        return job
+
+    def retry_after(self) -> int:
+        """Seconds until the queue should have room, from its length and job run time"""
+        return max(1, math.ceil(self.avg_run_time * self.queue.qsize() / max(settings.JOB_WORKERS, 1)))
+
+    def get(self, job_id: str) -> Optional[InferenceJob]:
+        """A job that is pending or finished within JOB_RESULT_TTL"""
+        self._expire()
+        return self.jobs.get(job_id)
+
+    async def wait(self, job: InferenceJob, timeout: float):
+        """Long-poll: return once the job finished or `timeout` (capped at JOB_MAX_WAIT) passed"""
+        timeout = min(timeout, settings.JOB_MAX_WAIT)
+        if job.finished or timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def cancel(self, job: InferenceJob) -> bool:
+        """Cancel a queued or running job (a running one releases its replica)"""
+        if job.finished:
+            return False
+        if job.task is not None:
+            job.task.cancel()  # _run records the cancellation
+        else:
+            self._finish(job, 'cancelled')  # the worker skips it when dequeued
+        return True
+
+    async def worker(self):
+        """One dispatcher: runs queued jobs one at a time"""
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.finished:
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                # Not awaited directly, so cancelling the job does not cancel the worker
+                await asyncio.wait({job.task})
+                if not job.finished:
+                    self._finish(job, 'cancelled')  # cancelled before it started
+            except asyncio.CancelledError:
+                if job.task is not None:
+                    job.task.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Error in job worker: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: InferenceJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        deadline = time.monotonic() + settings.JOB_TIMEOUT
+        try:
+            while True:
+                job.attempts += 1
+                remaining = deadline - time.monotonic()
+                try:
+                    result, cached = await asyncio.wait_for(
+                        inference_dispatcher.infer(job.model, job.input_data, timeout=remaining),
+                        remaining
+                    )
+                    break
+                except AdmissionRejected as e:
+                    # Overload is what jobs are meant to absorb: wait and try again
+                    if time.monotonic() + e.retry_after >= deadline:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(e.retry_after)
+
+            job.cached = cached
+            self._finish(job, 'succeeded', result)
+        except asyncio.CancelledError:
+            self._finish(job, 'cancelled')
+        except asyncio.TimeoutError:
+            self._finish(job, 'failed', error_status=504, error=f"Job did not finish within {settings.JOB_TIMEOUT}s")
+        except Exception as e:
+            error = as_http_error(e)
+            self._finish(job, 'failed', error_status=error.status_code, error=str(error.detail))
+        finally:
+            job.task = None
+
+        run_time = job.finished_at - job.started_at
+        self.avg_run_time = 0.9 * self.avg_run_time + 0.1 * run_time
+
+    def _finish(self, job: InferenceJob, status: str, result: Any = None,
+                error_status: Optional[int] = None, error: Optional[str] = None):
+        job.finish(status, result, error_status, error)
+        self.finished.append(job.id)
+        if status == 'succeeded':
+            self.succeeded += 1
+        elif status == 'failed':
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    def _expire(self):
+        """Drop finished jobs past JOB_RESULT_TTL (oldest first, so this stops early)"""
+        now = time.monotonic()
+        while self.finished:
+            job = self.jobs.get(self.finished[0])
+            if job is not None and job.expires_at > now:
+                break
+            if self.jobs.pop(self.finished.popleft(), None) is not None:
+                self.expired += 1
+
+    def get_stats(self) -> dict:
+        """Get job queue statistics"""
+        return {
+            'enabled': settings.JOBS_ENABLED,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'max_queued': settings.JOB_QUEUE_MAX_SIZE,
+            'workers': len(self.workers),
+            'running': sum(1 for job in self.jobs.values() if job.status == 'running'),
+            'stored': len(self.jobs),
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'retries': self.retries,
+            'expired': self.expired,
+            'avg_run_time': round(self.avg_run_time, 3)
+        }
+
+# Global instance
+job_queue = JobQueue()
@@ -0,0 +1,54 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+from ..config import settings
+
+class LatencyTracker:
+    """
+    Rolling window of inference latencies per model
+    Keeps the last LATENCY_WINDOW samples and answers percentile queries
+
+    latency_tracker sees what callers experience (admission wait, cold
+    starts, stream TTFB); replica_latency only the model calls themselves
+    """
+
+    def __init__(self):
+        self.samples: Dict[int, Deque[float]] = {}  # model_id: latencies in seconds
+
+    def record(self, model_id: int, seconds: float):
+        """Record one successful model call"""
+        window = self.samples.get(model_id)
+        if window is None:
+            window = deque(maxlen=settings.LATENCY_WINDOW)
+            self.samples[model_id] = window
+        window.append(seconds)
+
+    def percentile(self, model_id: int, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of recent latencies, or None without samples"""
+        window = self.samples.get(model_id)
+        if not window:
+            return None
+        ordered = sorted(window)
+        rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def p95(self, model_id: int) -> Optional[float]:
+        return self.percentile(model_id, 95)
+
+    def sample_count(self, model_id: int) -> int:
+        return len(self.samples.get(model_id, ()))
+
+    def get_stats(self) -> dict:
+        """Get latency statistics"""
+        return {
+            str(model_id): {
+                'samples': len(window),
+                'p50': round(self.percentile(model_id, 50), 4),
+                'p95': round(self.percentile(model_id, 95), 4)
+            }
+            for model_id, window in self.samples.items() if window
+        }
+
+# Global instances
+latency_tracker = LatencyTracker()
+replica_latency = LatencyTracker()
@@ -0,0 +1,267 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import bindparam, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from ..db import SessionLocal
+from ..models.model_registry import ContainerLease
+
+logger = logging.getLogger(__name__)
+
+class Lease:
+    """Snapshot of one lease row"""
+
+    def __init__(
+        self,
+        key: str,
+        owner: str,
+        state: str,
+        expires_at: datetime,
+        model_id: Optional[int] = None,
+        port: Optional[int] = None,
+        replica: bool = False,
+        last_used: Optional[datetime] = None
+    ):
+        self.key = key
+        self.owner = owner
+        self.state = state
+        self.expires_at = expires_at
+        self.model_id = model_id
+        self.port = port
+        self.replica = replica
+        self.last_used = last_used
+
+    def expired(self, now: Optional[datetime] = None) -> bool:
+        return self.expires_at < (now or datetime.utcnow())
+
+class LeaseStore(ABC):
+    """
+    Lease backend interface
+    Methods block (the Postgres backend does DB round trips): call them
+    through asyncio.to_thread from async code.
+    """
+    name = "base"
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float, state: str, model_id: Optional[int] = None,
+                port: Optional[int] = None, replica: bool = False) -> Lease:
+        """Take the lease if it is free, expired or already ours; returns the current holder's lease"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Lease]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_running(self, key: str, owner: str, port: int):
+        """Publish a started container (owner only)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def transition(self, key: str, from_states: Iterable[str], state: str, owner: Optional[str] = None,
+                   idle_before: Optional[datetime] = None) -> bool:
+        """Atomically move a lease between states; False if the conditions did not hold"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, key: str, owner: Optional[str] = None):
+        """Drop a lease (only if held by `owner` unless owner is None)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def heartbeat(self, owner: str, ttl: float, last_used: Dict[str, datetime]) -> List[Lease]:
+        """
+        Renew the owner's leases, merge its last-use times, take over
+        expired container leases it also tracks, and return every lease
+        """
+        raise NotImplementedError
+
+class MemoryLeaseStore(LeaseStore):
+    """In-process leases: one worker, no coordination needed (default)"""
+    name = "memory"
+
+    def __init__(self):
+        self.leases: Dict[str, Lease] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key, owner, ttl, state, model_id=None, port=None, replica=False):
+        now = datetime.utcnow()
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is None or lease.expired(now) or lease.owner == owner:
+                lease = Lease(key, owner, state, now + timedelta(seconds=ttl), model_id, port, replica, now)
+                self.leases[key] = lease
+            return lease
+
+    def get(self, key):
+        return self.leases.get(key)
+
+    def set_running(self, key, owner, port):
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is not None and lease.owner == owner:
+                lease.state = 'running'
+                lease.port = port
+
+    def transition(self, key, from_states, state, owner=None, idle_before=None):
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is None or lease.state not in from_states:
+                return False
+            if owner is not None and lease.owner != owner:
+                return False
+            if idle_before is not None and lease.last_used is not None and lease.last_used >= idle_before:
+                return False
+            lease.state = state
+            return True
+
+    def release(self, key, owner=None):
+        with self.lock:
+            lease = self.leases.get(key)
+            if lease is not None and (owner is None or lease.owner == owner):
+                del self.leases[key]
+
+    def heartbeat(self, owner, ttl, last_used):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        with self.lock:
+            for key, used_at in last_used.items():
+                lease = self.leases.get(key)
+                if lease is None:
+                    continue
+                if lease.last_used is None or used_at > lease.last_used:
+                    lease.last_used = used_at
+                if lease.expired(now) and lease.state in ('running', 'paused'):
+                    lease.owner = owner
+            for lease in self.leases.values():
+                if lease.owner == owner:
+                    lease.expires_at = expires_at
+            return list(self.leases.values())
+
+class PostgresLeaseStore(LeaseStore):
+    """
+    Leases in the container_leases table, shared by every worker and node
+    - Acquire is one INSERT ... ON CONFLICT DO UPDATE guarded by
+      "expired or already mine", so exactly one worker wins a start
+    - State changes are conditional UPDATEs (row-level, no table locks)
+    """
+    name = "postgres"
+
+    def _snapshot(self, row: ContainerLease) -> Lease:
+        return Lease(row.key, row.owner, row.state, row.expires_at, row.model_id, row.port, bool(row.replica), row.last_used)
+
+    def acquire(self, key, owner, ttl, state, model_id=None, port=None, replica=False):
+        now = datetime.utcnow()
+        values = {
+            'owner': owner,
+            'state': state,
+            'model_id': model_id,
+            'port': port,
+            'replica': replica,
+            'expires_at': now + timedelta(seconds=ttl),
+            'last_used': now
+        }
+        stmt = insert(ContainerLease).values(key=key, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ContainerLease.key],
+            set_=values,
+            where=or_(ContainerLease.expires_at < now, ContainerLease.owner == owner)
+        )
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            db.commit()
+            row = db.get(ContainerLease, key)
+            return self._snapshot(row)
+        finally:
+            db.close()
+
+    def get(self, key):
+        db = SessionLocal()
+        try:
+            row = db.get(ContainerLease, key)
+            return self._snapshot(row) if row is not None else None
+        finally:
+            db.close()
+
+    def set_running(self, key, owner, port):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ContainerLease)
+                .where(ContainerLease.key == key, ContainerLease.owner == owner)
+                .values(state='running', port=port)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def transition(self, key, from_states, state, owner=None, idle_before=None):
+        stmt = update(ContainerLease).where(ContainerLease.key == key, ContainerLease.state.in_(list(from_states)))
+        if owner is not None:
+            stmt = stmt.where(ContainerLease.owner == owner)
+        if idle_before is not None:
+            stmt = stmt.where(or_(ContainerLease.last_used.is_(None), ContainerLease.last_used < idle_before))
+        db = SessionLocal()
+        try:
+            result = db.execute(stmt.values(state=state))
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def release(self, key, owner=None):
+        stmt = delete(ContainerLease).where(ContainerLease.key == key)
+        if owner is not None:
+            stmt = stmt.where(ContainerLease.owner == owner)
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+
+    def heartbeat(self, owner, ttl, last_used):
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            if last_used:
+                # Keep the latest use seen by any worker (GREATEST ignores NULL)
+                leases = ContainerLease.__table__
+                db.connection().execute(
+                    update(leases)
+                    .where(leases.c.key == bindparam('lease_key'))
+                    .values(last_used=func.greatest(leases.c.last_used, bindparam('used_at'))),
+                    [{'lease_key': key, 'used_at': used_at} for key, used_at in last_used.items()]
+                )
+                # Adopt containers whose owner stopped heartbeating
+                db.execute(
+                    update(ContainerLease)
+                    .where(
+                        ContainerLease.key.in_(list(last_used)),
+                        ContainerLease.expires_at < now,
+                        ContainerLease.state.in_(['running', 'paused'])
+                    )
+                    .values(owner=owner)
+                )
+            db.execute(
+                update(ContainerLease)
+                .where(ContainerLease.owner == owner)
+                .values(expires_at=now + timedelta(seconds=ttl))
+            )
+            db.commit()
+            rows = db.execute(select(ContainerLease)).scalars().all()
+            return [self._snapshot(row) for row in rows]
+        finally:
+            db.close()
+
+BACKENDS = {backend.name: backend for backend in (MemoryLeaseStore, PostgresLeaseStore)}
+
+def build_lease_store(name: str) -> LeaseStore:
+    backend = BACKENDS.get(name.lower())
+    if backend is None:
+        logger.warning(f"Unknown lease backend '{name}', using memory")
+        backend = MemoryLeaseStore
+    return backend()
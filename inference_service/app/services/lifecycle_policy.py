@@ -0,0 +1,209 @@
+import math
+import time
+import logging
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from ..config import settings
+from ..db import SessionLocal
+from .container_manager import container_manager
+from .model_service import ModelService
+
+logger = logging.getLogger(__name__)
+
+# A prewarm that served no request is not repeated within this many seconds
+PREWARM_COOLDOWN = 3600
+
+class ModelArrivals:
+    """Request arrival history of one model"""
+
+    def __init__(self):
+        self.last_arrival: Optional[float] = None  # wall clock (time.time())
+        self.gaps: Deque[float] = deque(maxlen=settings.KEEPALIVE_HISTORY)  # inter-arrival seconds
+        self.sorted_gaps: Optional[List[float]] = None  # sorted copy, dropped on each new gap
+        self.hourly = [0.0] * 24  # request counts by UTC hour of day, decayed once per day
+        self.day = None  # UTC date the hourly counts were last decayed to
+        self.requests = 0
+
+    def record(self, now: float):
+        if self.last_arrival is not None:
+            self.gaps.append(now - self.last_arrival)
+            self.sorted_gaps = None
+        self.last_arrival = now
+        self.requests += 1
+
+        moment = datetime.utcfromtimestamp(now)
+        self.hourly = self.hourly_counts(moment.date())
+        self.day = moment.date()
+        self.hourly[moment.hour] += 1
+
+    def hourly_counts(self, day) -> List[float]:
+        """Hourly counts decayed to the given day"""
+        if self.day is None or day <= self.day:
+            return self.hourly
+        factor = settings.PREWARM_DAILY_DECAY ** (day - self.day).days
+        return [count * factor for count in self.hourly]
+
+    def gap_percentile(self, q: float) -> Optional[float]:
+        if len(self.gaps) < settings.KEEPALIVE_MIN_SAMPLES:
+            return None
+        if self.sorted_gaps is None:
+            self.sorted_gaps = sorted(self.gaps)
+        gaps = self.sorted_gaps
+        return gaps[max(math.ceil(q * len(gaps)) - 1, 0)]
+
+    def expected_in_hour(self, moment: datetime) -> float:
+        """Requests expected in the hour of day containing `moment`"""
+        # A sum decayed by d per day converges to daily count / (1 - d)
+        return self.hourly_counts(moment.date())[moment.hour] * (1 - settings.PREWARM_DAILY_DECAY)
+
+class LifecyclePolicy:
+    """
+    Per-model container lifecycle learned from request arrivals
+    - Keep-alive: a model's containers are paused after idling for a high
+      percentile of its inter-arrival gaps (clamped), instead of the global
+      CONTAINER_IDLE_TIMEOUT
+    - Prewarm: containers are started (or resumed) ahead of predicted
+      demand, for periodic callers whose gap is longer than the keep-alive
+      and for hours of the day that historically see traffic
+    - Prewarming only uses free CPU/memory budget
+      (it never evicts another model)
+    """
+
+    def __init__(self):
+        self.models: Dict[int, ModelArrivals] = {}
+        self.prewarmed: Dict[int, float] = {}  # model_id: when it was prewarmed (until its next request)
+        self.prewarms = 0
+        self.prewarm_hits = 0
+
+    def record_request(self, model_id: int):
+        """Record one inference request for a model"""
+        arrivals = self.models.get(model_id)
+        if arrivals is None:
+            arrivals = ModelArrivals()
+            self.models[model_id] = arrivals
+        arrivals.record(time.time())
+
+        if self.prewarmed.pop(model_id, None) is not None:
+            self.prewarm_hits += 1
+
+        # Re-learn the keep-alive once enough gaps are seen, then every
+        # KEEPALIVE_RECOMPUTE_EVERY requests (it sorts the gap history)
+        due = len(arrivals.gaps) == settings.KEEPALIVE_MIN_SAMPLES or \
+            arrivals.requests % max(settings.KEEPALIVE_RECOMPUTE_EVERY, 1) == 0
+        if settings.ADAPTIVE_KEEPALIVE_ENABLED and due:
+            keep_alive = self.keep_alive(arrivals)
+            current = container_manager.get_keep_alive(model_id)
+            # Re-index the model's containers only on material changes
+            if keep_alive is not None and abs(keep_alive - current) > 0.1 * current:
+                logger.info(f"Keep-alive for model {model_id}: {current:.0f}s -> {keep_alive:.0f}s")
+                container_manager.set_keep_alive(model_id, keep_alive)
+
+    def keep_alive(self, arrivals: ModelArrivals) -> Optional[float]:
+        """Learned keep-alive (None until enough gaps were seen)"""
+        gap = arrivals.gap_percentile(settings.KEEPALIVE_PERCENTILE)
+        if gap is None:
+            return None
+        return min(max(gap * settings.KEEPALIVE_MARGIN, settings.KEEPALIVE_MIN), settings.KEEPALIVE_MAX)
+
+    def predicted_demand(self, model_id: int, arrivals: ModelArrivals, now: float) -> float:
+        """Requests expected in the next hour if the model should be warm by now (else 0)"""
+        lead = settings.PREWARM_LEAD + container_manager.readiness.get_time_to_ready(model_id)
+        demand = 0.0
+
+        # Daily pattern: the hour we will be in once a container is ready
+        expected = arrivals.expected_in_hour(datetime.utcfromtimestamp(now + lead))
+        if expected >= settings.PREWARM_MIN_EXPECTED:
+            demand = expected
+
+        # Periodic caller: regular gaps too long to bridge with the keep-alive
+        median = arrivals.gap_percentile(0.5)
+        if median is not None and arrivals.last_arrival is not None:
+            shortest = arrivals.gap_percentile(0.05)
+            longest = arrivals.gap_percentile(settings.KEEPALIVE_PERCENTILE)
+            regular = shortest >= 0.5 * median
+            due = arrivals.last_arrival + shortest - lead <= now <= arrivals.last_arrival + longest * settings.KEEPALIVE_MARGIN
+            if regular and due and median > container_manager.get_keep_alive(model_id):
+                demand = max(demand, 3600 / median)
+
+        return demand
+
+    async def prewarm(self):
+        """Start or resume models ahead of predicted demand"""
+        now = time.time()
+        candidates: List[Tuple[float, int]] = []
+        for model_id, arrivals in self.models.items():
+            if container_manager.get_model_containers(model_id):
+                continue
+            prewarmed_at = self.prewarmed.get(model_id)
+            if prewarmed_at is not None and now - prewarmed_at < PREWARM_COOLDOWN:
+                continue
+            demand = self.predicted_demand(model_id, arrivals, now)
+            if demand > 0:
+                candidates.append((demand, model_id))
+
+        # Busiest first while the container budget lasts
+        candidates.sort(reverse=True)
+        for demand, model_id in candidates:
+            try:
+                # A paused container resumes without needing capacity
+                container_id = await container_manager.resume_model(model_id)
+                if container_id is not None:
+                    external_port = container_manager.get_container_port(container_id)
+                else:
+                    if not container_manager.has_capacity(model_id):
+                        continue
+
+                    db = SessionLocal()
+                    try:
+                        model = ModelService.get_cached_model(db, model_id)
+                    finally:
+                        db.close()
+                    if not model:
+                        self.models.pop(model_id, None)
+                        continue
+
+                    external_port = await container_manager.start_container(model.docker_container_id, model_id)
+
+                ModelService.queue_status_update(model_id, "running", external_port)
+
+                logger.info(f"Prewarmed model {model_id} ({demand:.1f} requests expected in the next hour)")
+                self.prewarmed[model_id] = now
+                self.prewarms += 1
+            except Exception as e:
+                logger.error(f"Failed to prewarm model {model_id}: {e}")
+
+    async def run(self):
+        """Background task prewarming models ahead of demand"""
+        while True:
+            try:
+                await asyncio.sleep(settings.PREWARM_INTERVAL)
+                if await container_manager.hold_job('prewarm'):
+                    await self.prewarm()
+            except Exception as e:
+                logger.error(f"Error in prewarm task: {e}")
+
+    def get_stats(self) -> dict:
+        """Get per-model keep-alive and prewarm statistics"""
+        now = time.time()
+        models = {}
+        for model_id, arrivals in self.models.items():
+            median = arrivals.gap_percentile(0.5)
+            models[str(model_id)] = {
+                'requests': arrivals.requests,
+                'keep_alive': round(container_manager.get_keep_alive(model_id), 1),
+                'gap_p50': round(median, 2) if median is not None else None,
+                'expected_next_hour': round(arrivals.expected_in_hour(datetime.utcfromtimestamp(now + 3600)), 2)
+            }
+
+        return {
+            'adaptive_keep_alive': settings.ADAPTIVE_KEEPALIVE_ENABLED,
+            'prewarm_enabled': settings.PREWARM_ENABLED,
+            'prewarms': self.prewarms,
+            'prewarm_hits': self.prewarm_hits,
+            'models': models
+        }
+
+# Global instance
+lifecycle_policy = LifecyclePolicy()
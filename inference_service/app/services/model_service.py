@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
-from ..models.model_registry import ModelRegistry
+from ..models.model_registry import ModelRegistry, ModelInfo
+from .registry_cache import registry_cache
+from .status_writer import status_writer
 from typing import List, Optional
 from datetime import datetime
 import logging
@@ -18,6 +20,7 @@ class ModelService:
         
         if existing:
             logger.info(f"Model already registered: {existing.model_name}")
+            registry_cache.put(existing)
             return existing
         
         model = ModelRegistry(
@@ -27,12 +30,15 @@ class ModelService:
             description=model_data.get('description'),
             docker_image=model_data['docker_image'],
             docker_container_id=model_data['docker_container_id'],
+            supports_batching=bool(model_data.get('supports_batching', False)),
+            cacheable=bool(model_data.get('cacheable', True)),
             status='available'
         )
         
         db.add(model)
         db.commit()
         db.refresh(model)
+        registry_cache.put(model)
         
         logger.info(f"Registered model: {model.model_name} (ID: {model.id})")
         return model
@@ -47,6 +53,18 @@ class ModelService:
         """Get model by ID"""
         return db.query(ModelRegistry).filter(ModelRegistry.id == model_id).first()
     
+    @staticmethod
+    def get_cached_model(db: Session, model_id: int) -> Optional[ModelInfo]:
+        """Get model by ID from the registry cache (read-through to the DB on miss)"""
+        info = registry_cache.get(model_id)
+        if info is not None:
+            return info
+        
+        model = ModelService.get_model_by_id(db, model_id)
+        if not model:
+            return None
+        return registry_cache.put(model)
+    
     @staticmethod
     def get_models_by_user(db: Session, username: str) -> List[ModelRegistry]:
         """Get all models for a user"""
@@ -68,8 +86,18 @@ class ModelService:
             if status == 'running':
                 model.last_used = datetime.utcnow()
             db.commit()
+            registry_cache.update_status(model_id, status, external_port, model.last_used)
             logger.info(f"Updated model {model_id} status to {status}")
     
+    @staticmethod
+    def queue_status_update(model_id: int, status: str, external_port: Optional[int] = None):
+        """
+        Update model status without a DB round trip
+        The registry cache changes now; model_registry is written by the
+        next write-behind flush
+        """
+        status_writer.record(model_id, status, external_port)
+    
     @staticmethod
     def delete_model(db: Session, model_id: int):
         """Delete model from registry"""
@@ -77,4 +105,5 @@ class ModelService:
         if model:
             db.delete(model)
             db.commit()
+            registry_cache.remove(model_id)
             logger.info(f"Deleted model: {model_id}")
\ No newline at end of file
@@ -0,0 +1,71 @@
+import httpx
+import time
+import logging
+import asyncio
+from typing import Dict
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class ContainerNotReadyError(Exception):
+    """Raised when a container does not answer before the startup timeout"""
+    pass
+
+class ReadinessProbe:
+    """
+    Polls a freshly started model container until it answers HTTP
+    - Exponential backoff between attempts
+    - Gives up after CONTAINER_STARTUP_TIMEOUT
+    - Records measured time-to-ready per model
+    """
+
+    def __init__(self):
+        self.time_to_ready: Dict[int, float] = {}  # model_id: seconds
+
+    async def wait_until_ready(self, client: httpx.AsyncClient, model_id: int) -> float:
+        """
+        Wait until the container behind `client` accepts requests.
+        Any HTTP answer below 500 (including 404/405 from models without
+        a health route) means the model server is up.
+        Returns: seconds until ready
+        """
+        start_time = time.monotonic()
+        deadline = start_time + settings.CONTAINER_STARTUP_TIMEOUT
+        delay = settings.READINESS_INITIAL_DELAY
+        attempts = 0
+
+        while True:
+            attempts += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ContainerNotReadyError(
+                    f"Model {model_id} not ready after {settings.CONTAINER_STARTUP_TIMEOUT}s "
+                    f"({attempts - 1} probes)"
+                )
+
+            try:
+                response = await client.get(settings.READINESS_PATH, timeout=min(remaining, 2.0))
+                if response.status_code < 500:
+                    elapsed = time.monotonic() - start_time
+                    self.time_to_ready[model_id] = elapsed
+                    logger.info(f"Model {model_id} ready in {elapsed:.2f}s ({attempts} probes)")
+                    return elapsed
+            except httpx.HTTPError:
+                # Server not listening yet
+                pass
+
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 2, settings.READINESS_MAX_DELAY)
+
+    def get_time_to_ready(self, model_id: int) -> float:
+        """Last measured time-to-ready for a model (0 if never measured)"""
+        return self.time_to_ready.get(model_id, 0.0)
+
+    def get_stats(self) -> dict:
+        """Get readiness statistics"""
+        return {
+            'time_to_ready': {
+                str(model_id): round(seconds, 3)
+                for model_id, seconds in self.time_to_ready.items()
+            }
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from ..models.model_registry import ModelInfo
+from .container_manager import (
+    container_manager, MANAGED_LABEL, MODEL_ID_LABEL, UPLOAD_ID_LABEL, REPLICA_LABEL
+)
+from .registry_cache import registry_cache
+from .docker_pool import DockerHost
+from .model_service import ModelService
+from .readiness import ContainerNotReadyError
+
+logger = logging.getLogger(__name__)
+
+class ContainerReconciler:
+    """
+    Rebuilds container bookkeeping from Docker after a restart
+    - One labelled `containers.list` call per Docker host (sparse: no
+      per-container inspect)
+    - Containers are matched to models by their llmops.model_id label
+      (replicas) or llmops.upload_id label (uploaded containers)
+    - Registry status is corrected for models found running and for
+      models marked running that have no container any more
+    """
+
+    def __init__(self):
+        self.adopted = 0
+        self.unmatched = 0
+        self.last_run = None
+
+    def _resolve(self, labels: dict) -> Optional[ModelInfo]:
+        """Model a labelled container belongs to"""
+        try:
+            if MODEL_ID_LABEL in labels:
+                return registry_cache.get(int(labels[MODEL_ID_LABEL]))
+            if UPLOAD_ID_LABEL in labels:
+                return registry_cache.get_by_upload(int(labels[UPLOAD_ID_LABEL]))
+        except ValueError:
+            pass
+        return None
+
+    def _host_port(self, attrs: dict) -> Optional[int]:
+        """External port of 8080/tcp from a sparse container listing"""
+        for port in attrs.get('Ports') or ():
+            if port.get('PrivatePort') == 8080 and port.get('Type') == 'tcp' and port.get('PublicPort'):
+                return int(port['PublicPort'])
+        return None
+
+    async def reconcile(self) -> dict:
+        """Adopt running and paused model containers; run before serving traffic"""
+        hosts = container_manager.pool.available_hosts()
+        if not hosts:
+            logger.warning("Docker client not available, skipping container reconciliation")
+            return {}
+
+        # One labelled list per Docker host, in parallel
+        listings = await asyncio.gather(
+            *[host.docker.list(sparse=True, filters={'label': f'{MANAGED_LABEL}=true'}) for host in hosts],
+            return_exceptions=True
+        )
+        containers = []
+        for host, listing in zip(hosts, listings):
+            if isinstance(listing, Exception):
+                logger.error(f"Failed to list containers on {host.name} for reconciliation: {listing}")
+                continue
+            containers.extend((host, container) for container in listing)
+
+        running_models: Dict[int, int] = {}  # model_id: external port
+        adopted = 0
+        for host, container in containers:
+            attrs = container.attrs
+            labels = attrs.get('Labels') or {}
+            model = self._resolve(labels)
+            port = self._host_port(attrs)
+            if model is None or port is None:
+                self.unmatched += 1
+                logger.info(f"Ignoring container {container.id[:12]} (no registered model or port)")
+                continue
+
+            replica = labels.get(REPLICA_LABEL) == 'true'
+            paused = attrs.get('State') == 'paused'
+            if container_manager.adopt(container, model.id, port, replica=replica, paused=paused, host=host):
+                adopted += 1
+                await container_manager.lease_adopted(container.id, model.id, port, replica, paused)
+            running_models.setdefault(model.id, port)
+
+        # Bring the registry in line with what is actually up
+        stale: Set[int] = {
+            model.id for model in registry_cache.by_id.values()
+            if model.status == 'running' and model.id not in running_models
+        }
+        for model_id, port in running_models.items():
+            ModelService.queue_status_update(model_id, "running", port)
+        for model_id in stale:
+            ModelService.queue_status_update(model_id, "available", None)
+
+        self.adopted += adopted
+        self.last_run = {
+            'listed': len(containers),
+            'adopted': adopted,
+            'models_up': len(running_models),
+            'stale_statuses': len(stale)
+        }
+        logger.info(
+            f"Reconciled {len(containers)} labelled containers: adopted {adopted}, "
+            f"{len(running_models)} models up, {len(stale)} stale statuses"
+        )
+        return self.last_run
+
+    async def adopt_started(self, container_id: str, host: DockerHost):
+        """Adopt a model container started outside this service (e.g. docker start)"""
+        try:
+            container = await host.docker.get(container_id)
+        except Exception as e:
+            logger.warning(f"Could not inspect started container {container_id[:12]}: {e}")
+            return
+
+        labels = container.labels or {}
+        model = self._resolve(labels) or registry_cache.get_by_container(container_id)
+        port_info = container.attrs['NetworkSettings']['Ports'].get('8080/tcp')
+        if model is None or not port_info:
+            return
+        port = int(port_info[0]['HostPort'])
+
+        # Only route to it once the model server answers
+        endpoint = container_manager.endpoint(container, host, port)
+        client = container_manager.http_clients.get_client(container_id, endpoint['port'], endpoint['address'], endpoint['uds'])
+        try:
+            await container_manager.readiness.wait_until_ready(client, model.id)
+        except ContainerNotReadyError as e:
+            logger.warning(f"Externally started container {container_id[:12]} never became ready: {e}")
+            await container_manager.http_clients.close_client(container_id)
+            return
+
+        replica = labels.get(REPLICA_LABEL) == 'true'
+        if container_manager.adopt(container, model.id, port, replica=replica, host=host):
+            await container_manager.lease_adopted(container_id, model.id, port, replica)
+            self.adopted += 1
+            ModelService.queue_status_update(model.id, "running", port)
+            logger.info(f"Adopted externally started container {container_id[:12]} of model {model.id}")
+
+    def get_stats(self) -> dict:
+        """Get reconciliation statistics"""
+        return {
+            'adopted': self.adopted,
+            'unmatched': self.unmatched,
+            'last_run': self.last_run
+        }
+
+# Global instance
+container_reconciler = ContainerReconciler()
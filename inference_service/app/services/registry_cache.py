@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from ..models.model_registry import ModelRegistry, ModelInfo
+
+logger = logging.getLogger(__name__)
+
+class RegistryCache:
+    """
+    In-process read-through cache of the model registry
+    - Snapshots (ModelInfo) indexed by id, upload id and container id
+    - Warmed from Postgres at startup, then kept current by model events
+      and status updates so the inference path needs no DB round trip
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, ModelInfo] = {}
+        self.by_container: Dict[str, int] = {}  # docker_container_id: model id
+        self.by_upload: Dict[int, int] = {}  # upload_id: model id
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session):
+        """Warm the cache with every registered model"""
+        models = db.query(ModelRegistry).all()
+        for model in models:
+            self.put(model)
+        self.loaded = True
+        logger.info(f"Registry cache warmed with {len(models)} models")
+
+    def put(self, model: ModelRegistry) -> ModelInfo:
+        """Insert or replace a model snapshot"""
+        info = ModelInfo.from_orm(model)
+        previous = self.by_id.get(info.id)
+        if previous is not None:
+            self._unindex(previous)
+
+        self.by_id[info.id] = info
+        self.by_container[info.docker_container_id] = info.id
+        self.by_upload[info.upload_id] = info.id
+        return info
+
+    def get(self, model_id: int) -> Optional[ModelInfo]:
+        info = self.by_id.get(model_id)
+        if info is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return info
+
+    def get_by_container(self, container_id: str) -> Optional[ModelInfo]:
+        model_id = self.by_container.get(container_id)
+        return self.by_id.get(model_id) if model_id is not None else None
+
+    def get_by_upload(self, upload_id: int) -> Optional[ModelInfo]:
+        model_id = self.by_upload.get(upload_id)
+        return self.by_id.get(model_id) if model_id is not None else None
+
+    def update_status(
+        self,
+        model_id: int,
+        status: str,
+        external_port: Optional[int] = None,
+        last_used: Optional[datetime] = None
+    ):
+        """Mirror a status change into the cached snapshot"""
+        info = self.by_id.get(model_id)
+        if info is None:
+            return
+        info.status = status
+        if external_port is not None:
+            info.external_port = external_port
+        if last_used is not None:
+            info.last_used = last_used
+
+    def remove(self, model_id: int):
+        info = self.by_id.pop(model_id, None)
+        if info is not None:
+            self._unindex(info)
+
+    def _unindex(self, info: ModelInfo):
+        if self.by_container.get(info.docker_container_id) == info.id:
+            del self.by_container[info.docker_container_id]
+        if self.by_upload.get(info.upload_id) == info.id:
+            del self.by_upload[info.upload_id]
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        return {
+            'loaded': self.loaded,
+            'models': len(self.by_id),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+# Global instance
+registry_cache = RegistryCache()
@@ -0,0 +1,202 @@
+import math
+import time
+import httpx
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Dict, List, Optional, Set, Tuple
+from ..config import settings
+from .container_manager import ContainerManager, container_manager
+from .latency_tracker import replica_latency
+
+logger = logging.getLogger(__name__)
+
+class NoReplicaAvailableError(Exception):
+    """Raised when a model has no running container to route to"""
+    pass
+
+# The request never reached the model (or the replica went away): safe to send elsewhere
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, NoReplicaAvailableError)
+
+class ReplicaRouter:
+    """
+    Least-outstanding-requests routing across a model's replicas
+    - Tracks in-flight requests per container
+    - Each request goes to the replica with the fewest in flight
+    - Ties are broken randomly so idle replicas share load
+    - call() can hedge a slow request to a second replica and fails over
+      to another replica on connection errors
+    - call() records the model call alone in replica_latency, which is
+      what hedge delays are based on
+    """
+
+    def __init__(self, manager: ContainerManager):
+        self.manager = manager
+        # container_id: outstanding requests; shared so the manager never pauses or evicts a busy container
+        self.in_flight: Dict[str, int] = manager.in_flight
+        self.routed: Dict[str, int] = {}  # container_id: total requests routed
+        self.hedge_budget: Dict[int, List[float]] = {}  # model_id: [eligible, hedged, updated], decaying
+        self.hedges = 0
+        self.hedge_wins = 0  # hedges that answered first
+        self.failovers = 0
+
+    def pick(self, model_id: int, exclude: Collection[str] = ()) -> str:
+        """Choose the replica with the fewest outstanding requests (other than `exclude`)"""
+        candidates = [cid for cid in self.manager.get_model_containers(model_id) if cid not in exclude]
+        if not candidates:
+            raise NoReplicaAvailableError(f"No running container for model {model_id}")
+
+        fewest = min(self.in_flight.get(cid, 0) for cid in candidates)
+        return random.choice([cid for cid in candidates if self.in_flight.get(cid, 0) == fewest])
+
+    def has_other(self, model_id: int, exclude: Collection[str]) -> bool:
+        """Whether a replica outside `exclude` is running"""
+        return any(cid not in exclude for cid in self.manager.get_model_containers(model_id))
+
+    @asynccontextmanager
+    async def acquire(self, model_id: int) -> AsyncIterator[str]:
+        """Reserve a replica for the duration of one request"""
+        async with self.hold(self.pick(model_id)) as container_id:
+            yield container_id
+
+    async def call(
+        self,
+        model_id: int,
+        fn: Callable[[str], Awaitable[Any]],
+        hedge_after: Optional[float] = None
+    ) -> Tuple[str, Any]:
+        """
+        Run fn(container_id) on the least loaded replica
+        - hedge_after: seconds without an answer before a duplicate goes to
+          a second replica (at most HEDGE_MAX_FRACTION of the model's recent
+          calls, see _hedge_budget); the first answer wins and the other
+          call is cancelled
+        - Connection errors fail over at once to an untried replica, up to
+          FAILOVER_MAX times
+        Returns: (container_id that answered, result)
+        """
+        tried: Set[str] = set()
+        attempts: Dict[asyncio.Task, str] = {}  # running call: container_id
+        hedged = False
+        failovers = 0
+        error: Optional[BaseException] = None
+
+        def launch():
+            container_id = self.pick(model_id, exclude=tried)
+            tried.add(container_id)
+            attempts[asyncio.create_task(self._run(model_id, container_id, fn))] = container_id
+
+        if hedge_after is not None:
+            self._hedge_budget(model_id)[0] += 1
+        launch()
+        first = next(iter(tried))
+        try:
+            while attempts:
+                can_hedge = (
+                    hedge_after is not None and not hedged
+                    and self.has_other(model_id, tried)
+                )
+                done, _ = await asyncio.wait(
+                    set(attempts),
+                    timeout=hedge_after if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    budget = self._hedge_budget(model_id)
+                    if budget[1] >= settings.HEDGE_MAX_FRACTION * budget[0]:
+                        hedge_after = None  # over budget: wait for the first call
+                        continue
+                    hedged = True
+                    try:
+                        launch()
+                    except NoReplicaAvailableError:
+                        # The other replica went away meanwhile: keep waiting for the first call
+                        hedge_after = None
+                        continue
+                    budget[1] += 1
+                    self.hedges += 1
+                    continue
+
+                for task in done:
+                    container_id = attempts.pop(task)
+                    if task.exception() is None:
+                        if hedged and container_id != first:
+                            self.hedge_wins += 1
+                        return container_id, task.result()
+
+                    error = task.exception()
+                    if isinstance(error, FAILOVER_ERRORS) and failovers < settings.FAILOVER_MAX \
+                            and self.has_other(model_id, tried):
+                        failovers += 1
+                        self.failovers += 1
+                        logger.warning(f"Replica {container_id[:12]} unreachable ({error!r}), failing over")
+                        launch()
+                    # Otherwise a call still in flight (if any) decides
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _run(self, model_id: int, container_id: str, fn: Callable[[str], Awaitable[Any]]) -> Any:
+        async with self.hold(container_id):
+            start_time = time.monotonic()
+            result = await fn(container_id)
+            replica_latency.record(model_id, time.monotonic() - start_time)
+            return result
+
+    def _hedge_budget(self, model_id: int) -> List[float]:
+        """
+        A model's [eligible calls, hedges], decayed exponentially over
+        HEDGE_BUDGET_WINDOW so a quiet period does not bank hedges for a
+        later burst
+        """
+        now = time.monotonic()
+        budget = self.hedge_budget.get(model_id)
+        if budget is None:
+            budget = self.hedge_budget[model_id] = [0.0, 0.0, now]
+        decay = math.exp(-(now - budget[2]) / settings.HEDGE_BUDGET_WINDOW)
+        budget[0] *= decay
+        budget[1] *= decay
+        budget[2] = now
+        return budget
+
+    @asynccontextmanager
+    async def hold(self, container_id: str) -> AsyncIterator[str]:
+        """Count one outstanding request against a replica"""
+        self.in_flight[container_id] = self.in_flight.get(container_id, 0) + 1
+        self.routed[container_id] = self.routed.get(container_id, 0) + 1
+        try:
+            yield container_id
+        finally:
+            remaining = self.in_flight.get(container_id, 1) - 1
+            if remaining > 0:
+                self.in_flight[container_id] = remaining
+            else:
+                self.in_flight.pop(container_id, None)
+            self.manager.request_finished(container_id)
+
+    def model_in_flight(self, model_id: int) -> int:
+        """Total outstanding requests across a model's replicas"""
+        return sum(self.in_flight.get(cid, 0) for cid in self.manager.get_model_containers(model_id))
+
+    def get_stats(self) -> dict:
+        """Get routing statistics"""
+        # Drop counters for containers that are gone
+        for cid in list(self.routed.keys()):
+            if cid not in self.manager.running_containers and cid not in self.in_flight:
+                del self.routed[cid]
+        for model_id in list(self.hedge_budget.keys()):
+            if not self.manager.get_model_containers(model_id):
+                del self.hedge_budget[model_id]
+
+        return {
+            'in_flight': {cid[:12]: count for cid, count in self.in_flight.items()},
+            'routed': {cid[:12]: count for cid, count in self.routed.items()},
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers
+        }
+
+# Global instance
+replica_router = ReplicaRouter(container_manager)
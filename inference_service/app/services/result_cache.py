@@ -0,0 +1,115 @@
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    In-process cache of inference results for deterministic models
+    - Keyed by model id + SHA-256 of the canonical JSON input
+    - LRU eviction above RESULT_CACHE_MAX_ENTRIES
+    - Entries expire after RESULT_CACHE_TTL seconds
+    - Entries are tied to the model's image/container and dropped when either changes
+    """
+
+    def __init__(self):
+        # (model_id, input_hash): (version, expires_at, result)
+        self.entries: "OrderedDict[Tuple[int, str], Tuple[str, float, Any]]" = OrderedDict()
+        self.model_keys: Dict[int, Set[Tuple[int, str]]] = {}  # model_id: keys (for invalidation)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def hash_input(input_data: dict) -> str:
+        """Canonical hash of an input payload (key order and whitespace independent)"""
+        canonical = json.dumps(input_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def model_version(model) -> str:
+        """Version tag for a model; cached results are only valid for this tag"""
+        return f"{model.docker_image}@{model.docker_container_id}"
+
+    def get(self, model, input_data: dict) -> Optional[Any]:
+        """Look up a cached result, or None on miss"""
+        key = (model.id, self.hash_input(input_data))
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        version, expires_at, result = entry
+        if version != self.model_version(model):
+            self._remove(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, model, input_data: dict, result: Any):
+        """Store a successful result"""
+        key = (model.id, self.hash_input(input_data))
+        self.entries[key] = (self.model_version(model), time.monotonic() + settings.RESULT_CACHE_TTL, result)
+        self.entries.move_to_end(key)
+        self.model_keys.setdefault(model.id, set()).add(key)
+
+        while len(self.entries) > settings.RESULT_CACHE_MAX_ENTRIES:
+            oldest_key, _ = self.entries.popitem(last=False)
+            self._forget_key(oldest_key)
+            self.evictions += 1
+
+    def invalidate_model(self, model_id: int):
+        """Drop every cached result for a model"""
+        keys = self.model_keys.pop(model_id, set())
+        for key in keys:
+            self.entries.pop(key, None)
+        if keys:
+            self.invalidations += len(keys)
+            logger.info(f"Invalidated {len(keys)} cached results for model {model_id}")
+
+    def _remove(self, key: Tuple[int, str]):
+        self.entries.pop(key, None)
+        self._forget_key(key)
+
+    def _forget_key(self, key: Tuple[int, str]):
+        keys = self.model_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.model_keys[key[0]]
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': settings.RESULT_CACHE_ENABLED,
+            'entries': len(self.entries),
+            'max_entries': settings.RESULT_CACHE_MAX_ENTRIES,
+            'ttl': settings.RESULT_CACHE_TTL,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
+
+# Global instance
+result_cache = ResultCache()
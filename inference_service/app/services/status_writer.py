@@ -0,0 +1,104 @@
+import logging
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import update
+from ..config import settings
+from ..db import SessionLocal
+from ..models.model_registry import ModelRegistry
+from .registry_cache import registry_cache
+
+logger = logging.getLogger(__name__)
+
+class StatusWriteBehind:
+    """
+    Write-behind buffer for model status and last_used
+    - Updates are applied to the registry cache immediately
+    - The DB sees one bulk UPDATE every STATUS_FLUSH_INTERVAL seconds
+      (and a final one on shutdown), off the request path
+    - Repeated updates to the same model coalesce into one row
+    """
+
+    def __init__(self):
+        self.pending: Dict[int, dict] = {}  # model_id: column values to write
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.updates_buffered = 0
+
+    def record(self, model_id: int, status: str, external_port: Optional[int] = None):
+        """Buffer a status change (same semantics as ModelService.update_model_status)"""
+        row = self.pending.setdefault(model_id, {'id': model_id})
+        row['status'] = status
+        if external_port is not None:
+            row['external_port'] = external_port
+        last_used = None
+        if status == 'running':
+            last_used = datetime.utcnow()
+            row['last_used'] = last_used
+
+        self.updates_buffered += 1
+        registry_cache.update_status(model_id, status, external_port, last_used)
+
+    async def start(self):
+        """Start the periodic flush task"""
+        self.running = True
+        self.task = asyncio.create_task(self.flush_loop())
+
+    async def stop(self):
+        """Stop flushing and write whatever is still buffered"""
+        self.running = False
+        if self.task:
+            self.task.cancel()
+        await self.flush()
+
+    async def flush_loop(self):
+        while self.running:
+            try:
+                await asyncio.sleep(settings.STATUS_FLUSH_INTERVAL)
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in status flush loop: {e}")
+
+    async def flush(self):
+        """Write buffered rows in one bulk UPDATE (in a worker thread)"""
+        if not self.pending:
+            return
+
+        rows = list(self.pending.values())
+        self.pending = {}
+        try:
+            await asyncio.to_thread(self._write, rows)
+            self.flushes += 1
+            self.rows_written += len(rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} status updates: {e}")
+            # Put rows back without clobbering anything newer
+            for row in rows:
+                newer = self.pending.get(row['id'])
+                self.pending[row['id']] = {**row, **newer} if newer else row
+
+    def _write(self, rows: List[dict]):
+        db = SessionLocal()
+        try:
+            # ORM bulk UPDATE by primary key
+            db.execute(update(ModelRegistry), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def get_stats(self) -> dict:
+        """Get write-behind statistics"""
+        return {
+            'pending_rows': len(self.pending),
+            'updates_buffered': self.updates_buffered,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'flush_interval': settings.STATUS_FLUSH_INTERVAL
+        }
+
+# Global instance
+status_writer = StatusWriteBehind()
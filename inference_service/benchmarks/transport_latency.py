@@ -0,0 +1,93 @@
+"""
+Per-request latency of each transport to a running model container
+
+Compares the published host port (docker-proxy), the container IP on the
+shared network and the unix socket on the shared volume, all with one
+keep-alive client per transport, against the same container.
+
+Run it where the inference service runs (same network and socket volume):
+
+    python benchmarks/transport_latency.py <container id or name> --requests 2000
+
+Environment: DOCKER_HOST, DOCKER_LOCAL_ADDRESS, MODEL_NETWORK and
+MODEL_SOCKET_DIR as for the inference service.
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import docker
+import httpx
+
+SOCKET_LABEL = 'llmops.socket'
+
+def endpoints(container) -> dict:
+    """transport: (base_url, unix socket) for every transport the container supports"""
+    attrs = container.attrs
+    found = {}
+
+    port_info = attrs['NetworkSettings']['Ports'].get('8080/tcp')
+    if port_info:
+        address = os.getenv("DOCKER_LOCAL_ADDRESS", "localhost")
+        found['port'] = (f"http://{address}:{port_info[0]['HostPort']}", None)
+
+    networks = attrs['NetworkSettings'].get('Networks') or {}
+    network = os.getenv("MODEL_NETWORK") or next(iter(networks), None)
+    ip = (networks.get(network) or {}).get('IPAddress') if network else None
+    if ip:
+        found['network'] = (f"http://{ip}:8080", None)
+
+    socket_name = (attrs['Config'].get('Labels') or {}).get(SOCKET_LABEL)
+    if socket_name:
+        path = os.path.join(os.getenv("MODEL_SOCKET_DIR", "/run/llmops"), socket_name)
+        if os.path.exists(path):
+            found['uds'] = ("http://model", path)
+    return found
+
+async def measure(base_url: str, uds, path: str, requests: int, warmup: int) -> list:
+    """Sequential request latencies in milliseconds over one keep-alive connection"""
+    transport = httpx.AsyncHTTPTransport(uds=uds) if uds else None
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=10) as client:
+        for _ in range(warmup):
+            await client.get(path)
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("container", help="model container id or name")
+    parser.add_argument("--path", default=os.getenv("READINESS_PATH", "/health"))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args()
+
+    container = docker.from_env().containers.get(args.container)
+    targets = endpoints(container)
+    if not targets:
+        raise SystemExit(f"No reachable transport for {args.container}")
+
+    results = {}
+    for transport, (base_url, uds) in targets.items():
+        results[transport] = await measure(base_url, uds, args.path, args.requests, args.warmup)
+
+    baseline = statistics.mean(results['port']) if 'port' in results else None
+    print(f"{'transport':<10}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'vs port':>10}  (ms, {args.requests} requests)")
+    for transport, latencies in results.items():
+        mean = statistics.mean(latencies)
+        delta = f"{mean - baseline:+.3f}" if baseline is not None else "-"
+        print(
+            f"{transport:<10}{mean:>9.3f}{percentile(latencies, 0.5):>9.3f}"
+            f"{percentile(latencies, 0.95):>9.3f}{percentile(latencies, 0.99):>9.3f}{delta:>10}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
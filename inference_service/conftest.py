@@ -0,0 +1 @@
+# Lets pytest import the service as `app` when run from inference_service/
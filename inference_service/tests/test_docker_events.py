@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.services import docker_events
+from app.services.docker_events import DockerEventWatcher, FakeEventSource
+from app.services.container_manager import MANAGED_LABEL, REPLICA_LABEL
+
+class FakeManager:
+    """The parts of ContainerManager the watcher uses"""
+
+    def __init__(self):
+        self.running = {}  # container_id: model_id
+        self.paused_containers = {}
+        self.starting = {}
+        host = SimpleNamespace(name='local')
+        self.pool = SimpleNamespace(get=lambda name: host if name == 'local' else None, default=host)
+
+    async def container_gone(self, container_id):
+        return self.running.pop(container_id, None)
+
+    def is_container_running(self, container_id):
+        return container_id in self.running
+
+    def has_model_containers(self, model_id):
+        return model_id in self.running.values()
+
+class FakeReconciler:
+    def __init__(self):
+        self.adopted = []
+
+    async def adopt_started(self, container_id, host):
+        self.adopted.append((container_id, host.name))
+
+@pytest.fixture
+def env(monkeypatch):
+    manager = FakeManager()
+    reconciler = FakeReconciler()
+    updates = []
+    registry = SimpleNamespace(
+        by_id={7: SimpleNamespace(id=7, status='running')},
+        get_by_container=lambda container_id: None
+    )
+    monkeypatch.setattr(docker_events, 'container_manager', manager)
+    monkeypatch.setattr(docker_events, 'container_reconciler', reconciler)
+    monkeypatch.setattr(docker_events, 'registry_cache', registry)
+    monkeypatch.setattr(docker_events, 'ModelService', SimpleNamespace(
+        queue_status_update=lambda model_id, status, port=None: updates.append((model_id, status))
+    ))
+    return SimpleNamespace(manager=manager, reconciler=reconciler, updates=updates)
+
+def run_events(emit):
+    """Feed events through a watcher reading a FakeEventSource; returns the watcher"""
+    async def main():
+        source = FakeEventSource()
+        watcher = DockerEventWatcher({'local': source})
+        watcher.start()
+        expected = emit(source)
+        for _ in range(200):
+            if sum(watcher.counts.values()) >= expected and not watcher.adopting:
+                break
+            await asyncio.sleep(0.01)
+        watcher.stop()
+        return watcher
+    return asyncio.run(main())
+
+def test_die_untracks_and_marks_model_available(env):
+    env.manager.running = {'c1': 7, 'c2': 7}
+
+    def emit(source):
+        source.emit('die', 'c1', exitCode='137')
+        source.emit('stop', 'c2')
+        return 2
+
+    watcher = run_events(emit)
+    assert env.manager.running == {}
+    assert watcher.crashes == 1
+    # Only once the model's last container is gone
+    assert env.updates == [(7, 'available')]
+
+def test_clean_exit_is_not_a_crash(env):
+    env.manager.running = {'c1': 7}
+    watcher = run_events(lambda source: source.emit('die', 'c1', exitCode='0') or 1)
+    assert watcher.crashes == 0
+    assert env.manager.running == {}
+
+def test_start_adopts_managed_containers(env):
+    def emit(source):
+        source.emit('start', 'ext', **{MANAGED_LABEL: 'true'})
+        source.emit('start', 'unmanaged')
+        return 2
+
+    run_events(emit)
+    assert env.reconciler.adopted == [('ext', 'local')]
+
+def test_start_skips_containers_already_tracked(env):
+    env.manager.running = {'running': 7}
+    env.manager.paused_containers = {'paused': {}}
+    env.manager.starting = {'starting': None}
+
+    def emit(source):
+        for container_id in ('running', 'paused', 'starting'):
+            source.emit('start', container_id, **{MANAGED_LABEL: 'true'})
+        source.emit('start', 'replica', **{MANAGED_LABEL: 'true', REPLICA_LABEL: 'true'})
+        return 4
+
+    run_events(emit)
+    assert env.reconciler.adopted == []
+
+def test_oom_is_counted(env):
+    env.manager.running = {'c1': 7}
+    watcher = run_events(lambda source: source.emit('oom', 'c1') or 1)
+    assert watcher.ooms == 1
+    assert env.manager.running == {'c1': 7}
+    assert watcher.counts == {'oom': 1}
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.services import docker_pool
+from app.services.docker_pool import DockerHost, DockerPool, build_strategy
+
+class FakeContainers:
+    def __init__(self, ids):
+        self.ids = set(ids)
+
+    def get(self, container_id):
+        if container_id not in self.ids:
+            raise KeyError(container_id)
+        return container_id
+
+class FakeDockerClient:
+    """Just enough of docker.DockerClient for placement"""
+
+    def __init__(self, ncpu=8, memory_mb=16384, containers=()):
+        self.ncpu = ncpu
+        self.memory_mb = memory_mb
+        self.containers = FakeContainers(containers)
+
+    def info(self):
+        return {'NCPU': self.ncpu, 'MemTotal': self.memory_mb * 1024 * 1024}
+
+def make_host(name, cpus=4, memory_mb=4096, max_containers=0, client=None):
+    return DockerHost(name, 'tcp://10.0.0.1:2375', '10.0.0.1', max_containers,
+                      client or FakeDockerClient(), cpus=cpus, memory_mb=memory_mb)
+
+def place_and_assign(pool, count, cpus=1.0, memory_mb=512):
+    placed = []
+    for i in range(count):
+        host = pool.place(cpus, memory_mb)
+        if host is None:
+            placed.append(None)
+            continue
+        pool.assign(f"c{len(placed)}", host, cpus, memory_mb)
+        placed.append(host.name)
+    return placed
+
+def test_least_loaded_spreads_containers():
+    pool = DockerPool([make_host('a'), make_host('b')], build_strategy('least_loaded'))
+    placed = place_and_assign(pool, 4)
+    assert placed.count('a') == 2 and placed.count('b') == 2
+
+def test_binpack_fills_one_host_first():
+    pool = DockerPool([make_host('a'), make_host('b')], build_strategy('binpack'))
+    placed = place_and_assign(pool, 6)
+    first = placed[0]
+    assert placed[:4] == [first] * 4
+    assert set(placed[4:]) == {'b' if first == 'a' else 'a'}
+
+def test_nothing_fits():
+    pool = DockerPool([make_host('a', cpus=2)], build_strategy('binpack'))
+    assert place_and_assign(pool, 3) == ['a', 'a', None]
+    assert not pool.has_room(1.0, 512)
+    pool.release('c0')
+    assert pool.place(1.0, 512).name == 'a'
+
+def test_memory_and_count_caps():
+    pool = DockerPool([make_host('a', memory_mb=1024), make_host('b', max_containers=1)], build_strategy('least_loaded'))
+    placed = place_and_assign(pool, 3, cpus=0.5, memory_mb=1024)
+    assert sorted(placed[:2]) == ['a', 'b'] and placed[2] is None
+    assert pool.hosts['a'].load() == 1.0
+    assert pool.hosts['b'].load() == 1.0
+    assert pool.place(0.5, 1) is None
+
+def test_unreachable_host_is_skipped(monkeypatch):
+    def refuse(base_url):
+        raise ConnectionError("connection refused")
+    monkeypatch.setattr(docker_pool.docker, 'DockerClient', refuse)
+    down = DockerHost('down', 'tcp://10.0.0.9:2375', '10.0.0.9', 0)
+    assert not down.available
+
+    for name in ('least_loaded', 'binpack'):
+        pool = DockerPool([down, make_host('up')], build_strategy(name))
+        assert place_and_assign(pool, 3) == ['up', 'up', 'up']
+        assert [host.name for host in pool.available_hosts()] == ['up']
+
+def test_budget_defaults_to_share_of_daemon(monkeypatch):
+    monkeypatch.setattr(settings, 'HOST_RESOURCE_FRACTION', 0.5)
+    host = DockerHost('a', 'unix:///var/run/docker.sock', 'localhost', 0, FakeDockerClient(ncpu=8, memory_mb=8192))
+    assert host.local
+    assert host.cpus == 4 and host.memory_mb == 4096
+
+def test_locate_finds_container_on_any_host():
+    a = make_host('a', client=FakeDockerClient(containers=['x']))
+    b = make_host('b', client=FakeDockerClient(containers=['y']))
+    pool = DockerPool([a, b], build_strategy('least_loaded'))
+    assert asyncio.run(pool.locate('y')) is b
+    assert pool.host_of('y') is b
+    assert asyncio.run(pool.locate('missing')) is None
+
+def test_unknown_strategy_falls_back():
+    assert build_strategy('nope').name == 'least_loaded'
+    with pytest.raises(TypeError):
+        docker_pool.PlacementStrategy()
@@ -16,6 +16,21 @@ class Settings:
     # Docker
     DOCKER_REGISTRY = os.getenv("DOCKER_REGISTRY", "localhost:5000")
     DOCKER_IMAGE_PREFIX = os.getenv("DOCKER_IMAGE_PREFIX", "ml-models")
+    DOCKER_HOST = os.getenv("DOCKER_HOST", "unix://var/run/docker.sock")  # daemon images are built and containers created on
+    DOCKER_MAX_WORKERS = int(os.getenv("DOCKER_MAX_WORKERS", "4"))  # threads for blocking Docker SDK calls
+    DOCKER_CALL_TIMEOUT = float(os.getenv("DOCKER_CALL_TIMEOUT", "30"))  # seconds per Docker call
+    DOCKER_BUILD_TIMEOUT = float(os.getenv("DOCKER_BUILD_TIMEOUT", "1800"))  # seconds per image build
+    DOCKER_PUSH_TIMEOUT = float(os.getenv("DOCKER_PUSH_TIMEOUT", "600"))  # seconds per image push
+    CONTAINER_STOP_GRACE = int(os.getenv("CONTAINER_STOP_GRACE", "10"))  # seconds before SIGKILL on stop
+    MODEL_NETWORK = os.getenv("MODEL_NETWORK", "")  # Docker network model containers join (shared with inference)
+    MODEL_SOCKET_VOLUME = os.getenv("MODEL_SOCKET_VOLUME", "llmops_model_sockets")  # volume holding model sockets
+    MODEL_SOCKET_DIR = os.getenv("MODEL_SOCKET_DIR", "/run/llmops")  # its mount path in model containers
+    
+    # Model container resources (when not declared at upload)
+    MODEL_DEFAULT_CPU_REQUEST = float(os.getenv("MODEL_DEFAULT_CPU_REQUEST", "0.5"))  # CPUs reserved
+    MODEL_DEFAULT_CPU_LIMIT = float(os.getenv("MODEL_DEFAULT_CPU_LIMIT", "1"))  # CPUs usable at most
+    MODEL_DEFAULT_MEMORY_REQUEST_MB = float(os.getenv("MODEL_DEFAULT_MEMORY_REQUEST_MB", "512"))  # MB reserved
+    MODEL_DEFAULT_MEMORY_LIMIT_MB = float(os.getenv("MODEL_DEFAULT_MEMORY_LIMIT_MB", "1024"))  # MB before OOM kill
     
     # App
     APP_NAME = "Upload Service"
@@ -5,6 +5,7 @@ import logging
 from .routes import upload_routes
 from .db import init_db
 from .services.kafka_service import kafka_service
+from .services.docker_service import docker_service
 from .config import settings
 
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +27,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Upload Service...")
     await kafka_service.stop()
+    docker_service.docker.shutdown()
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
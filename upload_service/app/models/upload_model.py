@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
@@ -16,6 +16,13 @@ class ModelUpload(Base):
     extracted_path = Column(String, nullable=False)
     docker_image = Column(String, nullable=False)
     docker_container_id = Column(String, nullable=True)
+    supports_batching = Column(Boolean, default=False)  # model exposes /predict_batch
+    cacheable = Column(Boolean, default=True)  # deterministic - results may be cached
+    supports_uds = Column(Boolean, default=False)  # model can listen on the MODEL_SOCKET unix socket
+    cpu_request = Column(Float, nullable=True)  # CPUs reserved for the container
+    cpu_limit = Column(Float, nullable=True)  # CPUs it may use at most
+    memory_request_mb = Column(Float, nullable=True)  # memory reserved (MB)
+    memory_limit_mb = Column(Float, nullable=True)  # memory it may use before being OOM-killed (MB)
     status = Column(String, default="uploaded")  # uploaded, building, ready, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -27,6 +34,13 @@ class ModelUploadCreate(BaseModel):
     username: str
     model_name: str
     description: Optional[str] = None
+    supports_batching: bool = False
+    cacheable: bool = True
+    supports_uds: bool = False
+    cpu_request: Optional[float] = None
+    cpu_limit: Optional[float] = None
+    memory_request_mb: Optional[float] = None
+    memory_limit_mb: Optional[float] = None
 
 class ModelUploadResponse(BaseModel):
     id: int
@@ -35,6 +49,13 @@ class ModelUploadResponse(BaseModel):
     description: Optional[str]
     docker_image: str
     docker_container_id: Optional[str]
+    supports_batching: bool = False
+    cacheable: bool = True
+    supports_uds: bool = False
+    cpu_request: Optional[float] = None
+    cpu_limit: Optional[float] = None
+    memory_request_mb: Optional[float] = None
+    memory_limit_mb: Optional[float] = None
     status: str
     created_at: datetime
     
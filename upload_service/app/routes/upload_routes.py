@@ -26,6 +26,13 @@ async def upload_model(
     username: str = Form(...),
     model_name: str = Form(...),
     description: Optional[str] = Form(None),
+    supports_batching: bool = Form(False),
+    cacheable: bool = Form(True),
+    supports_uds: bool = Form(False),
+    cpu_request: Optional[float] = Form(None),
+    cpu_limit: Optional[float] = Form(None),
+    memory_request_mb: Optional[float] = Form(None),
+    memory_limit_mb: Optional[float] = Form(None),
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -39,6 +46,12 @@ async def upload_model(
         if not file.filename.endswith('.zip'):
             raise HTTPException(status_code=400, detail="Only .zip files are allowed")
         
+        # Container resources (checked before the build)
+        try:
+            resources = docker_service.resolve_resources(cpu_request, cpu_limit, memory_request_mb, memory_limit_mb)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Check if model already exists
         existing = MetadataService.get_upload_by_name(db, username, model_name)
         if existing:
@@ -51,24 +64,13 @@ async def upload_model(
         # Step 2: Build Docker image
         logger.info("Step 2: Building Docker image...")
         try:
-            docker_image = docker_service.build_image(extracted_path, username, model_name)
+            docker_image = await docker_service.build_image(extracted_path, username, model_name)
         except Exception as e:
             StorageService.cleanup_model(username, model_name)
             raise HTTPException(status_code=500, detail=f"Docker build failed: {str(e)}")
         
-        # Step 3: Create container (don't start it)
-        logger.info("Step 3: Creating Docker container...")
-        container_name = f"{username}_{model_name}".replace(" ", "_").lower()
-        try:
-            container_info = docker_service.create_container(docker_image, container_name)
-            container_id = container_info['container_id']
-        except Exception as e:
-            docker_service.remove_image(docker_image)
-            StorageService.cleanup_model(username, model_name)
-            raise HTTPException(status_code=500, detail=f"Container creation failed: {str(e)}")
-        
-        # Step 4: Save metadata to database
-        logger.info("Step 4: Saving metadata to database...")
+        # Step 3: Save metadata to database (the upload id labels the container)
+        logger.info("Step 3: Saving metadata to database...")
         upload_record = MetadataService.create_upload_record(
             db=db,
             username=username,
@@ -77,10 +79,27 @@ async def upload_model(
             file_path=zip_path,
             extracted_path=extracted_path,
             docker_image=docker_image,
-            docker_container_id=container_id
+            supports_batching=supports_batching,
+            cacheable=cacheable,
+            supports_uds=supports_uds,
+            resources=resources
         )
         
-        # Update status to ready
+        # Step 4: Create container (don't start it)
+        logger.info("Step 4: Creating Docker container...")
+        container_name = f"{username}_{model_name}".replace(" ", "_").lower()
+        try:
+            container_info = await docker_service.create_container(
+                docker_image, container_name, upload_record.id, supports_uds=supports_uds, resources=resources
+            )
+            container_id = container_info['container_id']
+        except Exception as e:
+            MetadataService.delete_upload(db, upload_record.id)
+            await docker_service.remove_image(docker_image)
+            StorageService.cleanup_model(username, model_name)
+            raise HTTPException(status_code=500, detail=f"Container creation failed: {str(e)}")
+        
+        # Update status to ready (and record the container)
         MetadataService.update_status(db, upload_record.id, "ready", container_id)
         
         # Step 5: Publish to Kafka
@@ -92,6 +111,10 @@ async def upload_model(
             "description": description,
             "docker_image": docker_image,
             "docker_container_id": container_id,
+            "supports_batching": supports_batching,
+            "cacheable": cacheable,
+            "supports_uds": supports_uds,
+            **resources,
             "status": "ready"
         }
         await kafka_service.publish_model_uploaded(kafka_message)
@@ -140,7 +163,7 @@ async def delete_model(upload_id: int, db: Session = Depends(get_db)):
     StorageService.cleanup_model(upload.username, upload.model_name)
     
     # Remove Docker image
-    docker_service.remove_image(upload.docker_image)
+    await docker_service.remove_image(upload.docker_image)
     
     # Delete from database
     MetadataService.delete_upload(db, upload_id)
@@ -2,15 +2,32 @@ import os
 import docker
 from docker.errors import BuildError, APIError
 import logging
+from typing import Optional
 from ..config import settings
+from .async_docker import AsyncDocker
 
 logger = logging.getLogger(__name__)
 
+# Labels the inference service uses to find model containers after a restart
+MANAGED_LABEL = 'llmops.managed'
+UPLOAD_ID_LABEL = 'llmops.upload_id'
+SOCKET_LABEL = 'llmops.socket'  # socket file name in the shared socket volume
+# Requests the inference service packs containers by (limits are enforced by Docker)
+CPU_REQUEST_LABEL = 'llmops.cpu_request'
+CPU_LIMIT_LABEL = 'llmops.cpu_limit'
+MEMORY_REQUEST_LABEL = 'llmops.memory_request_mb'
+MEMORY_LIMIT_LABEL = 'llmops.memory_limit_mb'
+
 class DockerService:
+    """
+    Builds model images and creates their containers
+    Blocking Docker SDK calls run through AsyncDocker (off the event loop)
+    """
+    
     def __init__(self):
         try:
-            # Try to connect using the Docker socket
-            self.client = docker.DockerClient(base_url='unix://var/run/docker.sock')
+            # Connect to the configured daemon (the local socket by default)
+            self.client = docker.DockerClient(base_url=settings.DOCKER_HOST)
             # Test the connection
             self.client.ping()
             logger.info("Docker client initialized successfully")
@@ -18,6 +35,7 @@ class DockerService:
             logger.error(f"Failed to initialize Docker client: {e}")
             logger.warning("Docker service will not be available. Ensure Docker socket is mounted.")
             self.client = None
+        self.docker = AsyncDocker(self.client)
     
     def create_dockerfile(self, model_path: str) -> str:
         """Create Dockerfile for the model"""
@@ -45,7 +63,7 @@ CMD ["python", "app.py"]
         logger.info(f"Created Dockerfile at {dockerfile_path}")
         return dockerfile_path
     
-    def build_image(self, model_path: str, username: str, model_name: str) -> str:
+    async def build_image(self, model_path: str, username: str, model_name: str) -> str:
         """
         Build Docker image from model
         Returns: image tag
@@ -63,11 +81,13 @@ CMD ["python", "app.py"]
             logger.info(f"Building Docker image: {image_tag}")
             
             # Build image
-            image, build_logs = self.client.images.build(
+            image, build_logs = await self.docker.call(
+                self.client.images.build,
                 path=model_path,
                 tag=image_tag,
                 rm=True,
-                forcerm=True
+                forcerm=True,
+                call_timeout=settings.DOCKER_BUILD_TIMEOUT
             )
             
             # Log build output
@@ -85,7 +105,7 @@ CMD ["python", "app.py"]
             logger.error(f"Docker API error: {e}")
             raise Exception(f"Docker API error: {str(e)}")
     
-    def push_image(self, image_tag: str) -> bool:
+    async def push_image(self, image_tag: str) -> bool:
         """Push image to registry (optional)"""
         if not self.client:
             return False
@@ -93,10 +113,13 @@ CMD ["python", "app.py"]
         try:
             logger.info(f"Pushing image to registry: {image_tag}")
             
-            # Push to registry
-            for line in self.client.images.push(image_tag, stream=True, decode=True):
-                if 'status' in line:
-                    logger.info(line['status'])
+            # Push to registry (the progress stream is consumed in the worker thread)
+            def push():
+                for line in self.client.images.push(image_tag, stream=True, decode=True):
+                    if 'status' in line:
+                        logger.info(line['status'])
+            
+            await self.docker.call(push, call_timeout=settings.DOCKER_PUSH_TIMEOUT)
             
             logger.info(f"Successfully pushed image: {image_tag}")
             return True
@@ -105,9 +128,53 @@ CMD ["python", "app.py"]
             logger.warning(f"Failed to push image (optional): {e}")
             return False
     
-    def create_container(self, image_tag: str, container_name: str) -> dict:
+    @staticmethod
+    def resolve_resources(
+        cpu_request: Optional[float] = None,
+        cpu_limit: Optional[float] = None,
+        memory_request_mb: Optional[float] = None,
+        memory_limit_mb: Optional[float] = None
+    ) -> dict:
+        """
+        Requests and limits for a model container, defaults filled in
+        A limit left out is at least its request.
+        Raises: ValueError for non-positive values or a limit below its request
+        """
+        if cpu_request is None:
+            cpu_request = settings.MODEL_DEFAULT_CPU_REQUEST
+        if memory_request_mb is None:
+            memory_request_mb = settings.MODEL_DEFAULT_MEMORY_REQUEST_MB
+        if cpu_limit is None:
+            cpu_limit = max(settings.MODEL_DEFAULT_CPU_LIMIT, cpu_request)
+        if memory_limit_mb is None:
+            memory_limit_mb = max(settings.MODEL_DEFAULT_MEMORY_LIMIT_MB, memory_request_mb)
+        
+        if min(cpu_request, cpu_limit, memory_request_mb, memory_limit_mb) <= 0:
+            raise ValueError("CPU and memory requests and limits must be positive")
+        if cpu_limit < cpu_request:
+            raise ValueError(f"cpu_limit ({cpu_limit}) is below cpu_request ({cpu_request})")
+        if memory_limit_mb < memory_request_mb:
+            raise ValueError(f"memory_limit_mb ({memory_limit_mb}) is below memory_request_mb ({memory_request_mb})")
+        
+        return {
+            'cpu_request': cpu_request,
+            'cpu_limit': cpu_limit,
+            'memory_request_mb': memory_request_mb,
+            'memory_limit_mb': memory_limit_mb
+        }
+    
+    async def create_container(self, image_tag: str, container_name: str, upload_id: int,
+                               supports_uds: bool = False, resources: Optional[dict] = None) -> dict:
         """
         Create a container from the image (don't start it yet)
+        The container is labelled with its upload id so the inference
+        service can map it back to its model with one labelled list call.
+        With MODEL_NETWORK it joins that network (reached by container IP);
+        models that support it get a unix socket path in MODEL_SOCKET on
+        the shared socket volume.
+        CPU/memory limits are enforced by Docker; requests become CPU
+        shares and a memory reservation, and are labelled for the
+        inference service's budget.
         Returns: dict with container_id and port_mapping
         
         IMPORTANT: Each container's port 8080 is mapped to a RANDOM external port.
@@ -124,13 +191,41 @@ CMD ["python", "app.py"]
         try:
             logger.info(f"Creating container: {container_name}")
             
+            resources = resources or self.resolve_resources()
+            labels = {
+                MANAGED_LABEL: 'true',
+                UPLOAD_ID_LABEL: str(upload_id),
+                CPU_REQUEST_LABEL: str(resources['cpu_request']),
+                CPU_LIMIT_LABEL: str(resources['cpu_limit']),
+                MEMORY_REQUEST_LABEL: str(resources['memory_request_mb']),
+                MEMORY_LIMIT_LABEL: str(resources['memory_limit_mb'])
+            }
+            memory_limit = f"{int(resources['memory_limit_mb'])}m"
+            options = {
+                'nano_cpus': int(resources['cpu_limit'] * 1e9),
+                'cpu_shares': max(2, int(resources['cpu_request'] * 1024)),
+                'mem_limit': memory_limit,
+                'memswap_limit': memory_limit,  # no swap on top: over the limit means OOM-killed
+                'mem_reservation': f"{int(resources['memory_request_mb'])}m"
+            }
+            if settings.MODEL_NETWORK:
+                options['network'] = settings.MODEL_NETWORK
+            if supports_uds:
+                socket_name = f"{container_name}.sock"
+                labels[SOCKET_LABEL] = socket_name
+                options['environment'] = {'MODEL_SOCKET': f"{settings.MODEL_SOCKET_DIR}/{socket_name}"}
+                options['volumes'] = {settings.MODEL_SOCKET_VOLUME: {'bind': settings.MODEL_SOCKET_DIR, 'mode': 'rw'}}
+            
             # Create container with port mapping
             # ports={'8080/tcp': None} means Docker will assign a random available port
-            container = self.client.containers.create(
+            container = await self.docker.call(
+                self.client.containers.create,
                 image_tag,
                 name=container_name,
                 detach=True,
-                ports={'8080/tcp': None}  # Random external port assignment
+                ports={'8080/tcp': None},  # Random external port assignment
+                labels=labels,
+                **options
             )
             
             # Get the assigned port (will be available after starting)
@@ -150,7 +245,7 @@ CMD ["python", "app.py"]
             logger.error(f"Failed to create container: {e}")
             raise Exception(f"Failed to create container: {str(e)}")
     
-    def get_container_port(self, container_id: str) -> int:
+    async def get_container_port(self, container_id: str) -> int:
         """
         Get the external port mapped to container's port 8080
         This is called by the inference service after starting the container
@@ -159,7 +254,7 @@ CMD ["python", "app.py"]
             raise Exception("Docker client not available")
         
         try:
-            container = self.client.containers.get(container_id)
+            container = await self.docker.get(container_id)
             # Get port mapping
             port_info = container.attrs['NetworkSettings']['Ports'].get('8080/tcp')
             if port_info and len(port_info) > 0:
@@ -173,7 +268,7 @@ CMD ["python", "app.py"]
             logger.error(f"Failed to get container port: {e}")
             return None
     
-    def start_container(self, container_id: str) -> int:
+    async def start_container(self, container_id: str) -> int:
         """
         Start a container and return its external port
         """
@@ -181,49 +276,49 @@ CMD ["python", "app.py"]
             raise Exception("Docker client not available")
         
         try:
-            container = self.client.containers.get(container_id)
-            container.start()
+            container = await self.docker.get(container_id)
+            await self.docker.start(container)
             logger.info(f"Started container: {container_id[:12]}")
             
             # Get the assigned external port
-            external_port = self.get_container_port(container_id)
+            external_port = await self.get_container_port(container_id)
             return external_port
             
         except Exception as e:
             logger.error(f"Failed to start container: {e}")
             raise Exception(f"Failed to start container: {str(e)}")
     
-    def stop_container(self, container_id: str):
+    async def stop_container(self, container_id: str):
         """Stop a running container"""
         if not self.client:
             return
         
         try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+            container = await self.docker.get(container_id)
+            await self.docker.stop(container)
             logger.info(f"Stopped container: {container_id[:12]}")
         except Exception as e:
             logger.warning(f"Failed to stop container: {e}")
     
-    def remove_container(self, container_id: str):
+    async def remove_container(self, container_id: str):
         """Remove a container"""
         if not self.client:
             return
         
         try:
-            container = self.client.containers.get(container_id)
-            container.remove(force=True)
+            container = await self.docker.get(container_id)
+            await self.docker.call(container.remove, force=True)
             logger.info(f"Removed container: {container_id[:12]}")
         except Exception as e:
             logger.warning(f"Failed to remove container: {e}")
     
-    def remove_image(self, image_tag: str):
+    async def remove_image(self, image_tag: str):
         """Remove Docker image"""
         if not self.client:
             return
         
         try:
-            self.client.images.remove(image_tag, force=True)
+            await self.docker.call(self.client.images.remove, image_tag, force=True)
             logger.info(f"Removed image: {image_tag}")
         except Exception as e:
             logger.warning(f"Failed to remove image: {e}")
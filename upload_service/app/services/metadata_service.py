@@ -16,7 +16,11 @@ class MetadataService:
         file_path: str,
         extracted_path: str,
         docker_image: str,
-        docker_container_id: Optional[str] = None
+        docker_container_id: Optional[str] = None,
+        supports_batching: bool = False,
+        cacheable: bool = True,
+        supports_uds: bool = False,
+        resources: Optional[dict] = None
     ) -> ModelUpload:
         """Create a new model upload record"""
         upload = ModelUpload(
@@ -27,6 +31,10 @@ class MetadataService:
             extracted_path=extracted_path,
             docker_image=docker_image,
             docker_container_id=docker_container_id,
+            supports_batching=supports_batching,
+            cacheable=cacheable,
+            supports_uds=supports_uds,
+            **(resources or {}),
             status="building"
         )
         db.add(upload)